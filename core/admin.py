@@ -2,15 +2,21 @@ from django.contrib import admin
 
 from core.models import (
     Conversation,
+    ConversationMember,
     FriendRequest,
-    Friendship,
     Message,
+    ParsedPromptCache,
     Plan,
     PlanComment,
     PlanItem,
+    PlanJob,
     PlanJoin,
     PlanLike,
     PlanSave,
+    Place,
+    PlacesSearchCache,
+    Relationship,
+    ReverseGeocodeCache,
     UserProfile,
 )
 
@@ -18,6 +24,7 @@ from core.models import (
 class PlanItemInline(admin.TabularInline):
     model = PlanItem
     extra = 0
+    raw_id_fields = ('place',)
 
 
 @admin.register(Plan)
@@ -38,8 +45,56 @@ class FriendRequestAdmin(admin.ModelAdmin):
     list_display = ('from_user', 'to_user', 'state', 'created_at')
 
 
-admin.site.register(Friendship)
-admin.site.register(PlanItem)
+@admin.register(Relationship)
+class RelationshipAdmin(admin.ModelAdmin):
+    list_display = ('user', 'other_user', 'state', 'updated_at')
+    list_filter = ('state',)
+    raw_id_fields = ('user', 'other_user', 'request')
+
+
+@admin.register(ConversationMember)
+class ConversationMemberAdmin(admin.ModelAdmin):
+    list_display = ('user', 'other_user', 'last_message_at', 'unread_count')
+    raw_id_fields = ('conversation', 'user', 'other_user')
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'city_slug', 'rating', 'user_ratings_total', 'geohash', 'fetched_at')
+    search_fields = ('name', 'place_id', 'address')
+    list_filter = ('city_slug',)
+
+
+@admin.register(PlanItem)
+class PlanItemAdmin(admin.ModelAdmin):
+    list_display = ('plan', 'time_label', 'order', 'place')
+    raw_id_fields = ('plan', 'place')
+
+
+@admin.register(PlacesSearchCache)
+class PlacesSearchCacheAdmin(admin.ModelAdmin):
+    list_display = ('query', 'geo_cell', 'hits', 'misses', 'last_used_at', 'expires_at')
+    search_fields = ('query',)
+
+
+@admin.register(ReverseGeocodeCache)
+class ReverseGeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ('geohash', 'city_name', 'country_code', 'is_negative', 'hits', 'expires_at')
+    search_fields = ('geohash', 'city_name')
+
+
+@admin.register(ParsedPromptCache)
+class ParsedPromptCacheAdmin(admin.ModelAdmin):
+    list_display = ('normalized_prompt', 'numbers', 'hits', 'last_used_at', 'expires_at')
+    search_fields = ('normalized_prompt',)
+
+
+@admin.register(PlanJob)
+class PlanJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'attempts', 'worker_id', 'created_at', 'finished_at')
+    list_filter = ('status',)
+
+
 admin.site.register(PlanLike)
 admin.site.register(PlanSave)
 admin.site.register(PlanJoin)
@@ -0,0 +1,26 @@
+import base64
+import json
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+COMPRESSED_KEY = '_zlib'
+
+
+class CompactJSONField(models.JSONField):
+    # Large documents are stored as {"_zlib": "<base64>"} so the column stays valid JSON on every backend.
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if not isinstance(value, dict) or not settings.PLAN_JSON_COMPRESS:
+            return value
+        encoded = json.dumps(value, cls=self.encoder, separators=(',', ':')).encode('utf-8')
+        if len(encoded) < settings.PLAN_JSON_COMPRESS_MIN_BYTES:
+            return value
+        return {COMPRESSED_KEY: base64.b64encode(zlib.compress(encoded, 9)).decode('ascii')}
+
+    def from_db_value(self, value, expression, connection):
+        value = super().from_db_value(value, expression, connection)
+        if isinstance(value, dict) and set(value) == {COMPRESSED_KEY}:
+            return json.loads(zlib.decompress(base64.b64decode(value[COMPRESSED_KEY])), cls=self.decoder)
+        return value
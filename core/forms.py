@@ -6,6 +6,7 @@ from django.contrib.auth.models import User
 from django.utils.html import strip_tags
 
 from core.models import UserProfile
+from core.services import profile_images
 
 
 class RegisterForm(UserCreationForm):
@@ -16,9 +17,16 @@ class RegisterForm(UserCreationForm):
         fields = ('username', 'email', 'password1', 'password2')
 
 
+class ProfileImageField(forms.ImageField):
+    def to_python(self, data):
+        if data and hasattr(data, 'size'):
+            profile_images.check_upload(data)
+        return super().to_python(data)
+
+
 class ProfileEditForm(forms.ModelForm):
-    avatar = forms.ImageField(required=False)
-    cover = forms.ImageField(required=False)
+    avatar = ProfileImageField(required=False)
+    cover = ProfileImageField(required=False)
     likes_tags = forms.CharField(required=False, widget=forms.HiddenInput())
     hobbies_tags = forms.CharField(required=False, widget=forms.HiddenInput())
     avoid_tags = forms.CharField(required=False, widget=forms.HiddenInput())
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Conversation
+from core.services import inbox
+
+
+class Command(BaseCommand):
+    help = 'Build per-participant inbox rows (last message, preview, unread count) for existing conversations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Rows are recomputed from the messages table, so the command is safe to rerun.
+        rebuilt = 0
+        for conversation in Conversation.objects.only('id', 'user1_id', 'user2_id').iterator(chunk_size=options['batch_size']):
+            inbox.rebuild_members(conversation)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete. Rebuilt {rebuilt} conversations.'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Place, Plan
+from core.services import geohash, plan_document
+from core.services.place_catalog import PLACE_PRECISION, place_key
+
+
+class Command(BaseCommand):
+    help = 'Fill coordinates and types of shared places from the payloads stored in saved plans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Only places still missing coordinates are touched, so the command can be stopped and rerun.
+        plans = Plan.objects.filter(items__place__lat__isnull=True).distinct().only('plan_json')
+        pending = {}
+        updated_count = 0
+        for plan in plans.iterator(chunk_size=options['batch_size']):
+            for window in (plan.plan_json or {}).get('time_windows') or []:
+                for result in (window or {}).get('places') or []:
+                    place = plan_document.compact_place(result)
+                    if place.get('lat') is not None and place.get('lng') is not None:
+                        pending.setdefault(place_key(result), (place['lat'], place['lng'], place.get('types', [])))
+            if len(pending) >= options['batch_size']:
+                updated_count += self._update(pending)
+                pending = {}
+        updated_count += self._update(pending)
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete. Updated {updated_count} places.'))
+
+    def _update(self, pending):
+        places = list(Place.objects.filter(place_id__in=list(pending), lat__isnull=True))
+        for place in places:
+            place.lat, place.lng, types = pending[place.place_id]
+            place.geohash = geohash.encode(place.lat, place.lng, PLACE_PRECISION)
+            place.types = place.types or types
+        Place.objects.bulk_update(places, ['lat', 'lng', 'geohash', 'types'])
+        return len(places)
@@ -0,0 +1,54 @@
+import gzip
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.middleware import brotli
+from core.models import PlanJob
+from core.services.plan_document import RESPONSE_PLACE_FIELDS, SLIM_PLACE_FIELDS, project_plan
+
+
+def _sizes(document):
+    encoded = json.dumps(document, ensure_ascii=False).encode('utf-8')
+    sizes = {'raw': len(encoded), 'gzip': len(gzip.compress(encoded, compresslevel=6))}
+    if brotli is not None:
+        sizes['br'] = len(brotli.compress(encoded, quality=5))
+    return sizes
+
+
+class Command(BaseCommand):
+    help = 'Compare response sizes of full and slim generate-plan payloads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of recent finished plan jobs to measure.')
+        parser.add_argument('--file', help='Measure a saved generate-plan JSON response instead of plan jobs.')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            try:
+                with open(options['file'], encoding='utf-8') as handle:
+                    plans = [json.load(handle)]
+            except (OSError, json.JSONDecodeError) as exc:
+                raise CommandError(f'Could not read {options["file"]}: {exc}') from exc
+        else:
+            jobs = PlanJob.objects.filter(status=PlanJob.Status.DONE).order_by('-finished_at')[: options['limit']]
+            plans = [job.result for job in jobs if job.result]
+        if not plans:
+            raise CommandError('No finished plans to measure.')
+
+        totals = {}
+        for plan in plans:
+            for shape, fields in (('full', RESPONSE_PLACE_FIELDS), ('slim', SLIM_PLACE_FIELDS)):
+                for encoding, size in _sizes(project_plan(plan, fields)).items():
+                    totals[(shape, encoding)] = totals.get((shape, encoding), 0) + size
+
+        self.stdout.write(f'Plans measured: {len(plans)}')
+        for encoding in ('raw', 'gzip', 'br'):
+            if ('full', encoding) not in totals:
+                continue
+            full = totals[('full', encoding)] / len(plans)
+            slim = totals[('slim', encoding)] / len(plans)
+            self.stdout.write(f'{encoding:>4}: full {full:,.0f} B · slim {slim:,.0f} B · {slim / full:.1%} of full')
+        baseline = totals[('full', 'raw')]
+        smallest = min(size for (shape, _), size in totals.items() if shape == 'slim')
+        self.stdout.write(self.style.SUCCESS(f'Average bytes saved per plan: {(baseline - smallest) / len(plans):,.0f}'))
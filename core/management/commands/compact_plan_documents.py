@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Plan
+from core.services.plan_document import compact_plan, is_compact
+
+
+class Command(BaseCommand):
+    help = 'Rewrite stored plan documents into the compact format.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--start-after', default='', help='Resume after this plan id.')
+        parser.add_argument('--force', action='store_true', help='Rewrite documents that are already compact.')
+
+    def handle(self, *args, **options):
+        plans = Plan.objects.only('id', 'plan_json').order_by('pk')
+        last_id = options['start_after']
+        processed_count = rewritten_count = 0
+        while True:
+            batch = list((plans.filter(pk__gt=last_id) if last_id else plans)[: options['batch_size']])
+            if not batch:
+                break
+            changed = [plan for plan in batch if options['force'] or not is_compact(plan.plan_json)]
+            for plan in changed:
+                plan.plan_json = compact_plan(plan.plan_json or {})
+            Plan.objects.bulk_update(changed, ['plan_json'])
+            processed_count += len(batch)
+            rewritten_count += len(changed)
+            last_id = batch[-1].pk
+            self.stdout.write(f'Processed {processed_count} · rewritten {rewritten_count} · last id {last_id}')
+        self.stdout.write(self.style.SUCCESS(f'Compaction complete. Rewrote {rewritten_count} of {processed_count} plans.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.services.places_cache import cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show Google Places search cache hit/miss counters.'
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        lookups = stats['total_hits'] + stats['total_misses']
+        hit_ratio = stats['total_hits'] / lookups if lookups else 0.0
+        self.stdout.write(f"Entries: {stats['entries']}")
+        self.stdout.write(f"Hits: {stats['total_hits']} · Misses (API calls): {stats['total_misses']}")
+        self.stdout.write(self.style.SUCCESS(f'Hit ratio: {hit_ratio:.1%} · Text Search calls saved: {stats["total_hits"]}'))
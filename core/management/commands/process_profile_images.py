@@ -0,0 +1,31 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import UserProfile
+from core.services import profile_images
+
+
+class Command(BaseCommand):
+    help = 'Strip EXIF from uploaded avatars and covers and generate their resized variants.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Reprocess images that already have variants.')
+
+    def handle(self, *args, **options):
+        processed_count = failed_count = 0
+        profiles = UserProfile.objects.exclude(Q(avatar='') | Q(avatar__isnull=True), Q(cover='') | Q(cover__isnull=True))
+        for profile in profiles.iterator():
+            for field_name in profile_images.VARIANTS:
+                if not getattr(profile, field_name):
+                    continue
+                if field_name in (profile.image_variants or {}) and not options['force']:
+                    continue
+                try:
+                    profile_images.process(profile, field_name)
+                except (ValidationError, OSError) as exc:
+                    failed_count += 1
+                    self.stdout.write(self.style.WARNING(f'{profile.user_id} {field_name}: {exc}'))
+                    continue
+                processed_count += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed_count} images, {failed_count} failed.'))
@@ -0,0 +1,90 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services.plan_jobs import claim_next, heartbeat, purge_finished_jobs, recover_stale_jobs, release_jobs, run_job
+
+
+def _run_in_thread(job):
+    close_old_connections()
+    try:
+        run_job(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Process queued plan generation jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.PLAN_JOBS_WORKER_CONCURRENCY)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Process the jobs that are ready and exit.')
+        parser.add_argument(
+            '--shutdown-grace',
+            type=float,
+            default=25.0,
+            help='Seconds to let running jobs finish after SIGTERM before requeueing them.',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f'Plan worker {worker_id} started with concurrency {concurrency}.')
+
+        stopping = threading.Event()
+        previous_handlers = {signum: signal.signal(signum, lambda *_: stopping.set()) for signum in (signal.SIGTERM, signal.SIGINT)}
+
+        running = set()
+        last_heartbeat = time.monotonic()
+        last_maintenance = 0.0
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='plan-job')
+        try:
+            while not stopping.is_set():
+                running = {future for future in running if not future.done()}
+                now = time.monotonic()
+                # Jobs only write on progress, and one slow Places call can outlast the stale window.
+                if running and now - last_heartbeat >= settings.PLAN_JOBS_HEARTBEAT_SECONDS:
+                    heartbeat(worker_id)
+                    last_heartbeat = now
+                if now - last_maintenance > settings.PLAN_JOBS_STALE_SECONDS / 2:
+                    recovered = recover_stale_jobs()
+                    if recovered:
+                        self.stdout.write(self.style.WARNING(f'Recovered {recovered} stale jobs.'))
+                    purged = purge_finished_jobs()
+                    if purged:
+                        self.stdout.write(f'Purged {purged} finished jobs.')
+                    last_maintenance = now
+
+                claimed_any = False
+                while len(running) < concurrency and not stopping.is_set():
+                    job = claim_next(worker_id)
+                    if job is None:
+                        break
+                    claimed_any = True
+                    running.add(executor.submit(_run_in_thread, job))
+
+                if options['once'] and not claimed_any and not running:
+                    break
+                if not claimed_any:
+                    stopping.wait(options['poll_interval'])
+
+            if running:
+                self.stdout.write(f'Stopping plan worker, waiting up to {options["shutdown_grace"]:g}s for running jobs...')
+                _, unfinished = wait(running, timeout=options['shutdown_grace'])
+                if unfinished:
+                    # Their threads notice on the next progress write and stop; another worker picks them up.
+                    released = release_jobs(worker_id)
+                    self.stdout.write(self.style.WARNING(f'Requeued {released} unfinished jobs.'))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS('Plan worker stopped.'))
@@ -0,0 +1,137 @@
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_CONTENT_TYPES = {'application/json', 'application/x-ndjson'}
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    # WhiteNoise only ships a sync middleware, which makes Django run every
+    # request of an ASGI worker through one shared thread. This variant lets
+    # async views stay on the event loop and only serves files in a thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=None):
+        if settings is None:
+            super().__init__(get_response)
+        else:
+            super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+def _accepted_encoding(request):
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli is not None and re.search(r'\bbr\b', accept_encoding):
+        return 'br'
+    if re.search(r'\bgzip\b', accept_encoding):
+        return 'gzip'
+    return None
+
+
+class _Compressor:
+    # One stream per response: NDJSON chunks are flushed as they arrive but share the compression window.
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self._stream = brotli.Compressor(quality=5) if encoding == 'br' else zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        if self.encoding == 'br':
+            return self._stream.process(data) + self._stream.flush()
+        return self._stream.compress(data) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._stream.finish()
+        return self._stream.flush()
+
+
+def _compressed_stream(content, compressor):
+    for chunk in content:
+        yield compressor.chunk(chunk)
+    yield compressor.finish()
+
+
+async def _acompressed_stream(content, compressor):
+    async for chunk in content:
+        yield compressor.chunk(chunk)
+    yield compressor.finish()
+
+
+def compress_response(request, response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    if not settings.API_COMPRESSION_ENABLED or content_type not in COMPRESSIBLE_CONTENT_TYPES:
+        return response
+    if response.has_header('Content-Encoding'):
+        return response
+    if not response.streaming and len(response.content) < settings.API_COMPRESSION_MIN_BYTES:
+        return response
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = _accepted_encoding(request)
+    if encoding is None:
+        return response
+
+    compressor = _Compressor(encoding)
+    if response.streaming:
+        content = response.streaming_content
+        stream = _acompressed_stream if response.is_async else _compressed_stream
+        response.streaming_content = stream(content, compressor)
+        del response.headers['Content-Length']
+    else:
+        compressed = compressor.chunk(response.content) + compressor.finish()
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+class APICompressionMiddleware:
+    # Compresses JSON and NDJSON API responses only; HTML pages carry CSRF tokens and stay uncompressed.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compress_response(request, await self.get_response(request))
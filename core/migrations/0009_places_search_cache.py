@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_plan_city_name_plan_country_code_alter_plan_city_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlacesSearchCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cache_key", models.CharField(max_length=64, unique=True)),
+                ("query", models.CharField(max_length=255)),
+                ("geo_cell", models.CharField(blank=True, max_length=12)),
+                ("results", models.JSONField(default=list)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("misses", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "last_used_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-last_used_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_places_search_cache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReverseGeocodeCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("geohash", models.CharField(max_length=12, unique=True)),
+                ("city_name", models.CharField(blank=True, max_length=80)),
+                ("city_slug", models.SlugField(blank=True, max_length=90)),
+                ("country_code", models.CharField(blank=True, max_length=2)),
+                ("is_negative", models.BooleanField(default=False)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:11
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_plan_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParsedPromptCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cache_key", models.CharField(max_length=64, unique=True)),
+                ("scope", models.CharField(db_index=True, max_length=64)),
+                ("normalized_prompt", models.TextField()),
+                ("numbers", models.CharField(blank=True, max_length=120)),
+                ("signature", models.JSONField(default=list)),
+                ("parsed", models.JSONField(default=dict)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "last_used_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-last_used_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_parsed_prompt_cache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Place",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("place_id", models.CharField(max_length=255, unique=True)),
+                ("name", models.CharField(max_length=200)),
+                ("address", models.CharField(blank=True, max_length=255)),
+                ("types", models.JSONField(blank=True, default=list)),
+                ("rating", models.FloatField(blank=True, null=True)),
+                ("user_ratings_total", models.IntegerField(blank=True, null=True)),
+                ("price_level", models.IntegerField(blank=True, null=True)),
+                ("lat", models.FloatField(blank=True, null=True)),
+                ("lng", models.FloatField(blank=True, null=True)),
+                ("geohash", models.CharField(blank=True, db_index=True, max_length=12)),
+                ("city_slug", models.SlugField(blank=True, max_length=90)),
+                ("photo_reference", models.TextField(blank=True)),
+                ("maps_url", models.TextField(blank=True)),
+                ("fetched_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PlaceTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tag", models.CharField(max_length=60)),
+                ("cell", models.CharField(blank=True, max_length=12)),
+                ("city_slug", models.SlugField(blank=True, max_length=90)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="placetag",
+            name="place",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tags",
+                to="core.place",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="placetag",
+            index=models.Index(
+                fields=["tag", "cell"], name="core_placet_tag_2cc353_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="placetag",
+            index=models.Index(
+                fields=["tag", "city_slug"], name="core_placet_tag_3ec6b2_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="placetag",
+            constraint=models.UniqueConstraint(
+                fields=("place", "tag"), name="unique_place_tag"
+            ),
+        ),
+    ]
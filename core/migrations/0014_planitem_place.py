@@ -0,0 +1,162 @@
+import hashlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+PLACE_COLUMNS = [
+    "name",
+    "rating",
+    "user_ratings_total",
+    "price_level",
+    "address",
+    "photo_reference",
+    "maps_url",
+]
+
+
+def _place_key(item):
+    if item.google_place_id:
+        return item.google_place_id
+    digest = hashlib.sha1(
+        f"{item.name}|{item.address}".lower().encode("utf-8")
+    ).hexdigest()
+    return f"local:{digest}"
+
+
+def link_places(apps, schema_editor):
+    Place = apps.get_model("core", "Place")
+    PlanItem = apps.get_model("core", "PlanItem")
+    last_id = 0
+    while True:
+        batch = list(
+            PlanItem.objects.filter(id__gt=last_id)
+            .select_related("plan")
+            .order_by("id")[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        places = {}
+        for item in batch:
+            places.setdefault(
+                _place_key(item),
+                Place(
+                    place_id=_place_key(item),
+                    city_slug=item.plan.city_slug,
+                    fetched_at=item.plan.created_at,
+                    **{column: getattr(item, column) for column in PLACE_COLUMNS},
+                ),
+            )
+        Place.objects.bulk_create(places.values(), ignore_conflicts=True)
+        ids = dict(
+            Place.objects.filter(place_id__in=list(places)).values_list(
+                "place_id", "id"
+            )
+        )
+        for item in batch:
+            item.place_id = ids[_place_key(item)]
+        PlanItem.objects.bulk_update(batch, ["place"])
+        last_id = batch[-1].id
+
+
+def unlink_places(apps, schema_editor):
+    PlanItem = apps.get_model("core", "PlanItem")
+    last_id = 0
+    while True:
+        batch = list(
+            PlanItem.objects.filter(id__gt=last_id)
+            .select_related("place")
+            .order_by("id")[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for item in batch:
+            item.google_place_id = (
+                "" if item.place.place_id.startswith("local:") else item.place.place_id
+            )
+            for column in PLACE_COLUMNS:
+                setattr(item, column, getattr(item.place, column))
+        PlanItem.objects.bulk_update(batch, ["google_place_id", *PLACE_COLUMNS])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_place_catalog"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="planitem",
+            old_name="place_id",
+            new_name="google_place_id",
+        ),
+        migrations.AddField(
+            model_name="planitem",
+            name="place",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="plan_items",
+                to="core.place",
+            ),
+        ),
+        migrations.RunPython(link_places, unlink_places),
+        migrations.AlterField(
+            model_name="planitem",
+            name="place",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="plan_items",
+                to="core.place",
+            ),
+        ),
+        # Defaults let the reverse migration re-add the columns on populated tables.
+        migrations.AlterField(
+            model_name="planitem",
+            name="google_place_id",
+            field=models.CharField(default="", max_length=80),
+        ),
+        migrations.AlterField(
+            model_name="planitem",
+            name="name",
+            field=models.CharField(default="", max_length=200),
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="address",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="google_place_id",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="maps_url",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="name",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="photo_reference",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="photo_url",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="price_level",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="rating",
+        ),
+        migrations.RemoveField(
+            model_name="planitem",
+            name="user_ratings_total",
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:25
+
+import core.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_planitem_place"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="plan",
+            name="plan_json",
+            field=core.fields.CompactJSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_plan_json_compact"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,185 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FRIENDS, PENDING_OUT, PENDING_IN, BLOCKED = (
+    "friends",
+    "pending_out",
+    "pending_in",
+    "blocked",
+)
+MIRROR = {
+    FRIENDS: FRIENDS,
+    PENDING_OUT: PENDING_IN,
+    PENDING_IN: PENDING_OUT,
+    BLOCKED: BLOCKED,
+}
+BATCH_SIZE = 1000
+
+
+def _state(outgoing, incoming, friends):
+    # Same precedence the views used when friendship was derived on every request.
+    accepted = next(
+        (r for r in (outgoing, incoming) if r and r.state == "accepted"), None
+    )
+    if accepted or friends:
+        return FRIENDS, accepted
+    if outgoing and outgoing.state == "pending":
+        return PENDING_OUT, outgoing
+    if incoming and incoming.state == "pending":
+        return PENDING_IN, incoming
+    blocked = next(
+        (r for r in (outgoing, incoming) if r and r.state == "blocked"), None
+    )
+    if blocked:
+        return BLOCKED, blocked
+    return None, None
+
+
+def backfill_relationships(apps, schema_editor):
+    FriendRequest = apps.get_model("core", "FriendRequest")
+    Friendship = apps.get_model("core", "Friendship")
+    Relationship = apps.get_model("core", "Relationship")
+    requests = {
+        (r.from_user_id, r.to_user_id): r
+        for r in FriendRequest.objects.filter(
+            state__in=["accepted", "pending", "blocked"]
+        )
+    }
+    friend_pairs = {
+        tuple(sorted(pair))
+        for pair in Friendship.objects.values_list("user1_id", "user2_id")
+    }
+    # A self-pair would write the same (user, other_user) row twice; nobody can befriend themselves.
+    pairs = {
+        pair
+        for pair in {tuple(sorted(pair)) for pair in requests} | friend_pairs
+        if pair[0] != pair[1]
+    }
+    rows = []
+    for user_id, other_id in pairs:
+        state, friend_request = _state(
+            requests.get((user_id, other_id)),
+            requests.get((other_id, user_id)),
+            (user_id, other_id) in friend_pairs,
+        )
+        if state is None:
+            continue
+        rows.append(
+            Relationship(
+                user_id=user_id,
+                other_user_id=other_id,
+                state=state,
+                request=friend_request,
+            )
+        )
+        rows.append(
+            Relationship(
+                user_id=other_id,
+                other_user_id=user_id,
+                state=MIRROR[state],
+                request=friend_request,
+            )
+        )
+    Relationship.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def restore_friendships(apps, schema_editor):
+    Friendship = apps.get_model("core", "Friendship")
+    Relationship = apps.get_model("core", "Relationship")
+    pairs = Relationship.objects.filter(state=FRIENDS).values_list(
+        "user_id", "other_user_id"
+    )
+    Friendship.objects.bulk_create(
+        [
+            Friendship(user1_id=user_id, user2_id=other_id)
+            for user_id, other_id in pairs
+            if user_id < other_id
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0016_userprofile_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Relationship",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("friends", "Amigos"),
+                            ("pending_out", "Solicitud enviada"),
+                            ("pending_in", "Solicitud recibida"),
+                            ("blocked", "Bloqueado"),
+                        ],
+                        max_length=12,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="relationship",
+            name="other_user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="relationship",
+            name="request",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="core.friendrequest",
+            ),
+        ),
+        migrations.AddField(
+            model_name="relationship",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="relationships",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="relationship",
+            index=models.Index(
+                fields=["user", "state"], name="core_relati_user_id_9f4620_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="relationship",
+            constraint=models.UniqueConstraint(
+                fields=("user", "other_user"), name="unique_relationship_pair"
+            ),
+        ),
+        migrations.RunPython(backfill_relationships, restore_friendships),
+        migrations.DeleteModel(
+            name="Friendship",
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+import django.db.models.deletion
+
+PREVIEW_LENGTH = 140
+BATCH_SIZE = 1000
+
+
+def backfill_members(apps, schema_editor):
+    # Same rows inbox.rebuild_members writes, computed in one pass so the inbox is
+    # complete as soon as the migration finishes.
+    Conversation = apps.get_model("core", "Conversation")
+    ConversationMember = apps.get_model("core", "ConversationMember")
+    Message = apps.get_model("core", "Message")
+    last = Message.objects.filter(conversation=OuterRef("pk")).order_by("-created_at")
+    conversations = Conversation.objects.annotate(
+        last_at=Subquery(last.values("created_at")[:1]),
+        last_body=Subquery(last.values("body")[:1]),
+        unread_user1=Count(
+            "messages",
+            filter=Q(messages__is_read=False, messages__sender=F("user2")),
+        ),
+        unread_user2=Count(
+            "messages",
+            filter=Q(messages__is_read=False, messages__sender=F("user1")),
+        ),
+    )
+    rows = []
+    for conversation in conversations.iterator(chunk_size=BATCH_SIZE):
+        preview = " ".join((conversation.last_body or "").split())[:PREVIEW_LENGTH]
+        for user_id, other_id, unread in (
+            (conversation.user1_id, conversation.user2_id, conversation.unread_user1),
+            (conversation.user2_id, conversation.user1_id, conversation.unread_user2),
+        ):
+            rows.append(
+                ConversationMember(
+                    conversation_id=conversation.pk,
+                    user_id=user_id,
+                    other_user_id=other_id,
+                    last_message_at=conversation.last_at,
+                    last_message_preview=preview,
+                    unread_count=unread,
+                )
+            )
+        if len(rows) >= BATCH_SIZE:
+            ConversationMember.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    ConversationMember.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0017_relationship"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConversationMember",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_message_at", models.DateTimeField(blank=True, null=True)),
+                ("last_message_preview", models.CharField(blank=True, max_length=140)),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="conversationmember",
+            name="conversation",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="members",
+                to="core.conversation",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversationmember",
+            name="other_user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversationmember",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="conversation_memberships",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="conversationmember",
+            index=models.Index(
+                fields=["user", "-last_message_at"],
+                name="core_conver_user_id_0c626f_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="conversationmember",
+            constraint=models.UniqueConstraint(
+                fields=("conversation", "user"), name="unique_conversation_member"
+            ),
+        ),
+        migrations.RunPython(backfill_members, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:46
+
+from django.db import migrations, models
+
+
+def clear_prompt_cache(apps, schema_editor):
+    # Existing rows have no terms to compare, so they could still serve a near-duplicate with
+    # different meaning. The table is only a cache; it refills from new parses.
+    apps.get_model("core", "ParsedPromptCache").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_conversationmember"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="parsedpromptcache",
+            name="terms",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(clear_prompt_cache, migrations.RunPython.noop),
+    ]
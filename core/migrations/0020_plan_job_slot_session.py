@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_parsedpromptcache_terms"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="planjob",
+            name="session_key",
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name="planjob",
+            name="slot",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="planjob",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "running")),
+                fields=("slot",),
+                name="planjob_unique_running_slot",
+            ),
+        ),
+    ]
@@ -10,6 +10,8 @@ from django.utils import timezone
 from django.utils.html import strip_tags
 from django.utils.text import slugify
 
+from core.fields import CompactJSONField
+
 
 class UserProfile(models.Model):
     VIBE_CHOICES = [
@@ -33,6 +35,7 @@ class UserProfile(models.Model):
     instagram = models.CharField(max_length=60, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
     cover = models.ImageField(upload_to='covers/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     likes_tags = models.JSONField(default=list, blank=True)
     hobbies_tags = models.JSONField(default=list, blank=True)
@@ -99,28 +102,35 @@ class FriendRequest(models.Model):
         super().save(*args, **kwargs)
 
 
-class Friendship(models.Model):
-    user1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friendships_initiated')
-    user2 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friendships_received')
-    created_at = models.DateTimeField(auto_now_add=True)
+class Relationship(models.Model):
+    # One row per direction, so "how does user see other_user" is a single indexed lookup.
+    class State(models.TextChoices):
+        FRIENDS = 'friends', 'Amigos'
+        PENDING_OUT = 'pending_out', 'Solicitud enviada'
+        PENDING_IN = 'pending_in', 'Solicitud recibida'
+        BLOCKED = 'blocked', 'Bloqueado'
+
+    MIRROR = {
+        State.FRIENDS: State.FRIENDS,
+        State.PENDING_OUT: State.PENDING_IN,
+        State.PENDING_IN: State.PENDING_OUT,
+        State.BLOCKED: State.BLOCKED,
+    }
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='relationships')
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    state = models.CharField(max_length=12, choices=State.choices)
+    request = models.ForeignKey(FriendRequest, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
         constraints = [
-            models.UniqueConstraint(fields=['user1', 'user2'], name='unique_friend_pair'),
+            models.UniqueConstraint(fields=['user', 'other_user'], name='unique_relationship_pair'),
         ]
+        indexes = [models.Index(fields=['user', 'state'])]
 
-    def save(self, *args, **kwargs):
-        if self.user1_id and self.user2_id and self.user1_id > self.user2_id:
-            self.user1_id, self.user2_id = self.user2_id, self.user1_id
-        super().save(*args, **kwargs)
-
-    @classmethod
-    def are_friends(cls, user_a, user_b):
-        if not user_a or not user_b or user_a == user_b:
-            return False
-        user1, user2 = sorted([user_a.id, user_b.id])
-        return cls.objects.filter(user1_id=user1, user2_id=user2).exists()
+    def __str__(self):
+        return f'{self.user_id} → {self.other_user_id}: {self.state}'
 
 
 class Plan(models.Model):
@@ -135,7 +145,7 @@ class Plan(models.Model):
     group = models.CharField(max_length=40, blank=True)
     budget_cop = models.IntegerField(null=True, blank=True)
     prompt_text = models.TextField()
-    plan_json = models.JSONField(default=dict)
+    plan_json = CompactJSONField(default=dict)
     is_public = models.BooleanField(default=False)
     is_shared = models.BooleanField(default=False)
     shared_at = models.DateTimeField(null=True, blank=True)
@@ -169,19 +179,55 @@ class Plan(models.Model):
         return self.title
 
 
-class PlanItem(models.Model):
-    plan = models.ForeignKey(Plan, on_delete=models.CASCADE, related_name='items')
-    time_label = models.CharField(max_length=20)
-    order = models.IntegerField(default=0)
-    place_id = models.CharField(max_length=80)
+class Place(models.Model):
+    place_id = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=200)
+    address = models.CharField(max_length=255, blank=True)
+    types = models.JSONField(default=list, blank=True)
     rating = models.FloatField(null=True, blank=True)
     user_ratings_total = models.IntegerField(null=True, blank=True)
     price_level = models.IntegerField(null=True, blank=True)
-    address = models.CharField(max_length=255, blank=True)
+    lat = models.FloatField(null=True, blank=True)
+    lng = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+    city_slug = models.SlugField(max_length=90, blank=True)
     photo_reference = models.TextField(blank=True)
-    photo_url = models.TextField(blank=True)
     maps_url = models.TextField(blank=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def photo_url(self):
+        from core.services.google_places import build_photo_url
+
+        return build_photo_url(self.photo_reference) if self.photo_reference else ''
+
+
+class PlaceTag(models.Model):
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='tags')
+    tag = models.CharField(max_length=60)
+    cell = models.CharField(max_length=12, blank=True)
+    city_slug = models.SlugField(max_length=90, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['place', 'tag'], name='unique_place_tag')]
+        indexes = [
+            models.Index(fields=['tag', 'cell']),
+            models.Index(fields=['tag', 'city_slug']),
+        ]
+
+    def __str__(self):
+        return f'{self.tag} · {self.place_id}'
+
+
+class PlanItem(models.Model):
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE, related_name='items')
+    time_label = models.CharField(max_length=20)
+    order = models.IntegerField(default=0)
+    place = models.ForeignKey(Place, on_delete=models.PROTECT, related_name='plan_items')
 
     class Meta:
         ordering = ['time_label', 'order']
@@ -272,3 +318,111 @@ class Message(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class ConversationMember(models.Model):
+    # Per-participant inbox row, kept in step with Message writes by core.services.inbox.
+    PREVIEW_LENGTH = 140
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='members')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_member'),
+        ]
+        indexes = [models.Index(fields=['user', '-last_message_at'])]
+
+
+class PlacesSearchCache(models.Model):
+    cache_key = models.CharField(max_length=64, unique=True)
+    query = models.CharField(max_length=255)
+    geo_cell = models.CharField(max_length=12, blank=True)
+    results = models.JSONField(default=list)
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+    def __str__(self):
+        return self.query
+
+
+class ReverseGeocodeCache(models.Model):
+    geohash = models.CharField(max_length=12, unique=True)
+    city_name = models.CharField(max_length=80, blank=True)
+    city_slug = models.SlugField(max_length=90, blank=True)
+    country_code = models.CharField(max_length=2, blank=True)
+    is_negative = models.BooleanField(default=False)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.geohash} → {self.city_name or "-"}'
+
+
+class ParsedPromptCache(models.Model):
+    cache_key = models.CharField(max_length=64, unique=True)
+    scope = models.CharField(max_length=64, db_index=True)
+    normalized_prompt = models.TextField()
+    numbers = models.CharField(max_length=120, blank=True)
+    terms = models.CharField(max_length=255, blank=True)
+    signature = models.JSONField(default=list)
+    parsed = models.JSONField(default=dict)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+    def __str__(self):
+        return self.normalized_prompt[:80]
+
+
+class PlanJob(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'En cola'
+        RUNNING = 'running', 'En proceso'
+        DONE = 'done', 'Lista'
+        FAILED = 'failed', 'Fallida'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='plan_jobs')
+    # Anonymous jobs are only readable from the session that queued them.
+    session_key = models.CharField(max_length=40, blank=True)
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.QUEUED)
+    request_payload = models.JSONField(default=dict)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    worker_id = models.CharField(max_length=80, blank=True)
+    # One of PLAN_JOBS_MAX_RUNNING slots; the partial unique constraint is what caps running jobs.
+    slot = models.PositiveSmallIntegerField(null=True, blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'available_at'])]
+        constraints = [
+            models.UniqueConstraint(fields=['slot'], condition=models.Q(status='running'), name='planjob_unique_running_slot'),
+        ]
+
+    def __str__(self):
+        return f'{self.id} ({self.status})'
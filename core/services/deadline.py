@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+
+# Below this there is no point starting a network call; the step is skipped instead.
+MIN_CALL_SECONDS = 0.5
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds: float, expires_at: float | None = None):
+        self.expires_at = expires_at if expires_at is not None else time.monotonic() + seconds
+
+    @classmethod
+    def for_plan(cls) -> 'Deadline':
+        return cls(settings.PLAN_SLA_SECONDS)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() < MIN_CALL_SECONDS
+
+    def allows(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def reserve(self, seconds: float) -> 'Deadline':
+        # A tighter deadline for one stage that keeps `seconds` free for the stages after it.
+        return Deadline(0, expires_at=self.expires_at - seconds)
+
+    def timeout(self, cap: float) -> float:
+        remaining = self.remaining()
+        if remaining < MIN_CALL_SECONDS:
+            raise DeadlineExceeded('Se agotó el tiempo disponible para generar el plan.')
+        return min(cap, remaining)
@@ -0,0 +1,112 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Relationship
+
+logger = logging.getLogger(__name__)
+
+KEY_VERSION = 1
+# Only worth it where a cache read is cheaper than the indexed Relationship lookup it replaces;
+# on DatabaseCache it is a SELECT plus unpickling, and a per-process LocMemCache cannot be invalidated.
+SHARED_MEMORY_BACKENDS = {
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+}
+# Local counters are pushed to the shared cache in batches so a hit never costs a write.
+STATS_FLUSH_EVERY = 100
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+_pending = {'hits': 0, 'misses': 0}
+
+
+def _key(user_id: int) -> str:
+    return f'friends:v{KEY_VERSION}:{user_id}'
+
+
+def _stats_key(name: str) -> str:
+    return f'friends:stats:{name}'
+
+
+def _record(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+        _pending[name] += 1
+        if _pending['hits'] + _pending['misses'] < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_pending)
+        _pending.update(hits=0, misses=0)
+    _flush(pending)
+
+
+def _flush(pending: dict[str, int]) -> None:
+    for name, count in pending.items():
+        if not count:
+            continue
+        try:
+            cache.add(_stats_key(name), 0, timeout=None)
+            cache.incr(_stats_key(name), count)
+        except ValueError:
+            # The counter expired between add and incr; start it over.
+            cache.set(_stats_key(name), count, timeout=None)
+        except Exception:
+            logger.warning('Friend cache stats flush failed', exc_info=True)
+
+
+def enabled() -> bool:
+    return settings.FRIEND_CACHE_ENABLED and settings.CACHES['default']['BACKEND'] in SHARED_MEMORY_BACKENDS
+
+
+def _load(user_id: int) -> frozenset[int]:
+    return frozenset(
+        Relationship.objects.filter(user_id=user_id, state=Relationship.State.FRIENDS).values_list('other_user_id', flat=True)
+    )
+
+
+def friend_ids(user_id: int) -> frozenset[int]:
+    if not enabled():
+        return _load(user_id)
+    cached = cache.get(_key(user_id))
+    if cached is not None:
+        _record('hits')
+        return cached
+    _record('misses')
+    ids = _load(user_id)
+    cache.set(_key(user_id), ids, timeout=settings.FRIEND_CACHE_TTL)
+    return ids
+
+
+def are_friends(user_a, user_b) -> bool:
+    if not user_a or not user_b or user_a == user_b:
+        return False
+    if not enabled():
+        return Relationship.objects.filter(user=user_a, other_user=user_b, state=Relationship.State.FRIENDS).exists()
+    return user_b.id in friend_ids(user_a.id)
+
+
+def invalidate(*user_ids: int) -> None:
+    keys = [_key(user_id) for user_id in user_ids if user_id]
+    if not keys or not enabled():
+        return
+    # Deleting after commit keeps a concurrent reader from re-caching the pre-commit set.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def cache_stats() -> dict[str, int]:
+    with _stats_lock:
+        process_stats = dict(_stats)
+        pending = dict(_pending)
+        _pending.update(hits=0, misses=0)
+    _flush(pending)
+    totals = cache.get_many([_stats_key('hits'), _stats_key('misses')])
+    return {
+        'process_hits': process_stats['hits'],
+        'process_misses': process_stats['misses'],
+        'total_hits': totals.get(_stats_key('hits'), 0),
+        'total_misses': totals.get(_stats_key('misses'), 0),
+    }
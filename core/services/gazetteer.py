@@ -0,0 +1,78 @@
+import csv
+import math
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from core.services.text import normalize_text
+
+DATA_PATH = Path(__file__).resolve().parent.parent / 'data' / 'co_municipalities.csv'
+GRID_CELL_DEGREES = 0.2
+EARTH_RADIUS_KM = 6371.0
+
+
+@dataclass(frozen=True)
+class Municipality:
+    name: str
+    department: str
+    lat: float
+    lng: float
+
+
+_index: dict[tuple[int, int], list[Municipality]] | None = None
+_index_lock = threading.Lock()
+_names: dict[str, str] | None = None
+
+
+def _cell(lat: float, lng: float) -> tuple[int, int]:
+    return math.floor(lat / GRID_CELL_DEGREES), math.floor(lng / GRID_CELL_DEGREES)
+
+
+def _load_index() -> dict[tuple[int, int], list[Municipality]]:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                grid: dict[tuple[int, int], list[Municipality]] = {}
+                with DATA_PATH.open(encoding='utf-8') as handle:
+                    for row in csv.DictReader(handle):
+                        municipality = Municipality(row['name'], row['department'], float(row['lat']), float(row['lng']))
+                        grid.setdefault(_cell(municipality.lat, municipality.lng), []).append(municipality)
+                _index = grid
+    return _index
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def nearest_municipality(lat: float, lng: float, max_distance_km: float) -> Municipality | None:
+    index = _load_index()
+    row, col = _cell(lat, lng)
+    # Cells are ~22 km wide; widen the ring of neighbours for larger search distances.
+    reach = max(1, math.ceil(max_distance_km / (GRID_CELL_DEGREES * 111)))
+    best = None
+    best_distance = max_distance_km
+    for d_row in range(-reach, reach + 1):
+        for d_col in range(-reach, reach + 1):
+            for municipality in index.get((row + d_row, col + d_col), ()):
+                distance = haversine_km(lat, lng, municipality.lat, municipality.lng)
+                if distance <= best_distance:
+                    best, best_distance = municipality, distance
+    return best
+
+
+def municipality_names() -> dict[str, str]:
+    # Normalized name -> display name, for spotting a city mentioned in free text.
+    global _names
+    if _names is None:
+        names = {}
+        for cell in _load_index().values():
+            for municipality in cell:
+                names.setdefault(normalize_text(municipality.name), municipality.name)
+        _names = names
+    return _names
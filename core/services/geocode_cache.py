@@ -0,0 +1,55 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import ReverseGeocodeCache
+from core.services import geohash
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned on a negative hit so callers can tell it apart from a miss.
+NEGATIVE = object()
+
+
+def cell_for(lat: float, lng: float) -> str:
+    return geohash.encode(lat, lng, settings.GEOCODE_CACHE_PRECISION)
+
+
+def get_cached_location(cell: str):
+    if not settings.GEOCODE_CACHE_ENABLED:
+        return None
+    try:
+        entry = ReverseGeocodeCache.objects.filter(geohash=cell, expires_at__gt=timezone.now()).first()
+        if entry is None:
+            return None
+        ReverseGeocodeCache.objects.filter(pk=entry.pk).update(hits=F('hits') + 1)
+    except DatabaseError:
+        logger.warning('Reverse geocode cache lookup failed', exc_info=True)
+        return None
+    if entry.is_negative:
+        return NEGATIVE
+    return entry
+
+
+def store_location(cell: str, city_name: str, city_slug: str, country_code: str) -> None:
+    _store(cell, settings.GEOCODE_CACHE_TTL, city_name=city_name, city_slug=city_slug, country_code=country_code, is_negative=False)
+
+
+def store_failure(cell: str) -> None:
+    _store(cell, settings.GEOCODE_CACHE_NEGATIVE_TTL, city_name='', city_slug='', country_code='', is_negative=True)
+
+
+def _store(cell: str, ttl: int, **values) -> None:
+    if not settings.GEOCODE_CACHE_ENABLED:
+        return
+    try:
+        ReverseGeocodeCache.objects.update_or_create(
+            geohash=cell,
+            defaults={**values, 'expires_at': timezone.now() + timedelta(seconds=ttl)},
+        )
+    except DatabaseError:
+        logger.warning('Reverse geocode cache write failed', exc_info=True)
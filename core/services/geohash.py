@@ -0,0 +1,76 @@
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Approximate cell width in meters for each precision (worst case, at the equator).
+CELL_WIDTH_METERS = {1: 5_000_000, 2: 1_250_000, 3: 156_000, 4: 39_100, 5: 4_890, 6: 1_220, 7: 153, 8: 38}
+
+
+def encode(lat: float, lng: float, precision: int = 6) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    current = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if lng >= mid:
+                current = (current << 1) | 1
+                lng_range[0] = mid
+            else:
+                current <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                current = (current << 1) | 1
+                lat_range[0] = mid
+            else:
+                current <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[current])
+            bit = 0
+            current = 0
+    return ''.join(chars)
+
+
+def precision_for_radius(radius_m: float) -> int:
+    # Largest precision whose cells are still at least half the search radius wide.
+    for precision in sorted(CELL_WIDTH_METERS, reverse=True):
+        if CELL_WIDTH_METERS[precision] >= radius_m / 2:
+            return precision
+    return 1
+
+
+def decode_bbox(cell: str) -> tuple[float, float, float, float]:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            target[1 - bit] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def neighbors(cell: str) -> list[str]:
+    # The cell itself plus the eight cells around it.
+    min_lat, max_lat, min_lng, max_lng = decode_bbox(cell)
+    lat_step = max_lat - min_lat
+    lng_step = max_lng - min_lng
+    center_lat = (min_lat + max_lat) / 2
+    center_lng = (min_lng + max_lng) / 2
+    cells = []
+    for d_lat in (-1, 0, 1):
+        for d_lng in (-1, 0, 1):
+            lat = max(-90.0, min(90.0, center_lat + d_lat * lat_step))
+            lng = (center_lng + d_lng * lng_step + 180.0) % 360.0 - 180.0
+            cells.append(encode(lat, lng, len(cell)))
+    return list(dict.fromkeys(cells))
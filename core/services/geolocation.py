@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 
+import httpx
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.utils.text import slugify
 
+from core.services import gazetteer, geocode_cache, http_client
+from core.services.deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
 GOOGLE_GEOCODE_URL = 'https://maps.googleapis.com/maps/api/geocode/json'
 NOMINATIM_REVERSE_URL = 'https://nominatim.openstreetmap.org/reverse'
+NOMINATIM_HEADERS = {'User-Agent': 'DescubremeBot/1.0'}
 
 
 @dataclass
@@ -27,16 +36,15 @@ def _normalize(city_name: str, country_code: str = 'CO') -> ResolvedLocation:
     return ResolvedLocation(city_name=cleaned_city, city_slug=slugify(cleaned_city), country_code=code)
 
 
-def _city_from_google(lat: float, lng: float) -> ResolvedLocation | None:
-    if not settings.GOOGLE_PLACES_API_KEY:
-        return None
-    response = requests.get(
-        GOOGLE_GEOCODE_URL,
-        params={'latlng': f'{lat},{lng}', 'key': settings.GOOGLE_PLACES_API_KEY, 'language': 'es'},
-        timeout=15,
-    )
-    response.raise_for_status()
-    payload = response.json()
+def _google_params(lat: float, lng: float) -> dict:
+    return {'latlng': f'{lat},{lng}', 'key': settings.GOOGLE_PLACES_API_KEY, 'language': 'es'}
+
+
+def _nominatim_params(lat: float, lng: float) -> dict:
+    return {'lat': lat, 'lon': lng, 'format': 'jsonv2', 'accept-language': 'es'}
+
+
+def _city_from_google_payload(payload: dict) -> ResolvedLocation | None:
     if payload.get('status') != 'OK':
         return None
 
@@ -54,15 +62,7 @@ def _city_from_google(lat: float, lng: float) -> ResolvedLocation | None:
     return None
 
 
-def _city_from_nominatim(lat: float, lng: float) -> ResolvedLocation | None:
-    response = requests.get(
-        NOMINATIM_REVERSE_URL,
-        params={'lat': lat, 'lon': lng, 'format': 'jsonv2', 'accept-language': 'es'},
-        headers={'User-Agent': 'DescubremeBot/1.0'},
-        timeout=15,
-    )
-    response.raise_for_status()
-    payload = response.json()
+def _city_from_nominatim_payload(payload: dict) -> ResolvedLocation | None:
     address = payload.get('address', {})
     city = address.get('city') or address.get('town') or address.get('municipality') or address.get('state_district')
     country_code = (address.get('country_code') or 'co').upper()
@@ -71,10 +71,149 @@ def _city_from_nominatim(lat: float, lng: float) -> ResolvedLocation | None:
     return _normalize(city, country_code)
 
 
-def resolve_city_from_coordinates(lat: float | None, lng: float | None) -> ResolvedLocation | None:
+def _city_from_google(lat: float, lng: float, deadline: Deadline | None = None) -> ResolvedLocation | None:
+    if not settings.GOOGLE_PLACES_API_KEY:
+        return None
+    response = http_client.get('google_geocoding', GOOGLE_GEOCODE_URL, deadline=deadline, params=_google_params(lat, lng))
+    response.raise_for_status()
+    return _city_from_google_payload(response.json())
+
+
+def _city_from_nominatim(lat: float, lng: float, deadline: Deadline | None = None) -> ResolvedLocation | None:
+    if not _fallback_allowed(deadline):
+        return None
+    response = http_client.get(
+        'nominatim', NOMINATIM_REVERSE_URL, deadline=deadline, params=_nominatim_params(lat, lng), headers=NOMINATIM_HEADERS
+    )
+    response.raise_for_status()
+    return _city_from_nominatim_payload(response.json())
+
+
+async def _city_from_google_async(lat: float, lng: float, deadline: Deadline | None = None) -> ResolvedLocation | None:
+    if not settings.GOOGLE_PLACES_API_KEY:
+        return None
+    response = await http_client.async_get(
+        'google_geocoding', GOOGLE_GEOCODE_URL, deadline=deadline, params=_google_params(lat, lng)
+    )
+    response.raise_for_status()
+    return _city_from_google_payload(response.json())
+
+
+async def _city_from_nominatim_async(lat: float, lng: float, deadline: Deadline | None = None) -> ResolvedLocation | None:
+    if not _fallback_allowed(deadline):
+        return None
+    response = await http_client.async_get(
+        'nominatim', NOMINATIM_REVERSE_URL, deadline=deadline, params=_nominatim_params(lat, lng), headers=NOMINATIM_HEADERS
+    )
+    response.raise_for_status()
+    return _city_from_nominatim_payload(response.json())
+
+
+def _city_from_gazetteer(lat: float, lng: float) -> tuple[ResolvedLocation | None, bool]:
+    # The bundled list only has the larger municipalities, so a match is trusted only close to
+    # its centroid; further out it may be a neighbouring town that is missing from the list.
+    municipality = gazetteer.nearest_municipality(lat, lng, settings.GAZETTEER_MAX_DISTANCE_KM)
+    if municipality is None:
+        return None, False
+    distance = gazetteer.haversine_km(lat, lng, municipality.lat, municipality.lng)
+    return _normalize(municipality.name, 'CO'), distance <= settings.GAZETTEER_TRUST_DISTANCE_KM
+
+
+def _network_needed(offline: ResolvedLocation | None, trusted: bool, deadline: Deadline | None) -> bool:
+    if offline and trusted and not settings.GEOLOCATION_NETWORK_REFINEMENT:
+        return False
+    if deadline is not None and deadline.expired():
+        return False
+    return settings.GEOLOCATION_NETWORK_ENABLED
+
+
+def _fallback_allowed(deadline: Deadline | None) -> bool:
+    # Nominatim is only a fallback; skip it when less than half of its usual timeout is left.
+    return deadline is None or deadline.allows(http_client.SERVICES['nominatim'].timeout / 2)
+
+
+def _approximate(offline: ResolvedLocation | None, trusted: bool, lat: float, lng: float) -> ResolvedLocation | None:
+    if offline and not trusted:
+        logger.info('Using approximate gazetteer match %s for %.4f,%.4f', offline.city_name, lat, lng)
+    return offline
+
+
+def _stage_deadline(deadline: Deadline | None) -> Deadline | None:
+    return deadline.reserve(settings.PLAN_GEOLOCATION_RESERVE_SECONDS) if deadline is not None else None
+
+
+def _from_cache_entry(cached, offline: ResolvedLocation | None) -> ResolvedLocation | None:
+    if cached is geocode_cache.NEGATIVE:
+        return offline
+    return ResolvedLocation(city_name=cached.city_name, city_slug=cached.city_slug, country_code=cached.country_code)
+
+
+def _remember(cell: str, resolved: ResolvedLocation | None) -> None:
+    if resolved is None:
+        geocode_cache.store_failure(cell)
+    else:
+        geocode_cache.store_location(cell, resolved.city_name, resolved.city_slug, resolved.country_code)
+
+
+def resolve_city_from_coordinates(
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline | None = None,
+) -> ResolvedLocation | None:
     if lat is None or lng is None:
         return None
+
+    offline, trusted = _city_from_gazetteer(lat, lng)
+    deadline = _stage_deadline(deadline)
+    if not _network_needed(offline, trusted, deadline):
+        return _approximate(offline, trusted, lat, lng)
+
+    cell = geocode_cache.cell_for(lat, lng)
+    cached = geocode_cache.get_cached_location(cell)
+    if cached is not None:
+        return _from_cache_entry(cached, offline)
+
     try:
-        return _city_from_google(lat, lng) or _city_from_nominatim(lat, lng)
+        resolved = _city_from_google(lat, lng, deadline) or _city_from_nominatim(lat, lng, deadline)
+    except DeadlineExceeded:
+        return _approximate(offline, trusted, lat, lng)
     except requests.RequestException as exc:
+        geocode_cache.store_failure(cell)
+        if offline:
+            return _approximate(offline, trusted, lat, lng)
         raise GeolocationError('No fue posible resolver la ciudad por GPS.') from exc
+
+    _remember(cell, resolved)
+    return resolved or _approximate(offline, trusted, lat, lng)
+
+
+async def resolve_city_from_coordinates_async(
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline | None = None,
+) -> ResolvedLocation | None:
+    if lat is None or lng is None:
+        return None
+
+    offline, trusted = _city_from_gazetteer(lat, lng)
+    deadline = _stage_deadline(deadline)
+    if not _network_needed(offline, trusted, deadline):
+        return _approximate(offline, trusted, lat, lng)
+
+    cell = geocode_cache.cell_for(lat, lng)
+    cached = await sync_to_async(geocode_cache.get_cached_location)(cell)
+    if cached is not None:
+        return _from_cache_entry(cached, offline)
+
+    try:
+        resolved = await _city_from_google_async(lat, lng, deadline) or await _city_from_nominatim_async(lat, lng, deadline)
+    except DeadlineExceeded:
+        return _approximate(offline, trusted, lat, lng)
+    except httpx.HTTPError as exc:
+        await sync_to_async(geocode_cache.store_failure)(cell)
+        if offline:
+            return _approximate(offline, trusted, lat, lng)
+        raise GeolocationError('No fue posible resolver la ciudad por GPS.') from exc
+
+    await sync_to_async(_remember)(cell, resolved)
+    return resolved or _approximate(offline, trusted, lat, lng)
@@ -1,75 +1,140 @@
 from typing import Any
 from urllib.parse import quote_plus
 
+import httpx
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from core.services import http_client, photo_cache, places_cache
+from core.services.deadline import Deadline
+
 TEXT_SEARCH_URL = 'https://maps.googleapis.com/maps/api/place/textsearch/json'
+SEARCH_LANGUAGE = 'es'
+SEARCH_REGION = 'co'
+SEARCH_RADIUS_METERS = 6500
 
 
 class GooglePlacesAPIError(Exception):
     pass
 
 
+class GooglePlacesUnavailable(GooglePlacesAPIError):
+    # Transport failures (timeouts, resets, 5xx after retries), as opposed to a rejected request.
+    pass
+
+
 def price_level_to_cop(price_level: int | None) -> int | None:
     mapping = {0: 15000, 1: 30000, 2: 60000, 3: 110000, 4: 180000}
     return mapping.get(price_level)
 
 
-def _safe_get(url: str, params: dict[str, Any]) -> dict[str, Any]:
-    response = requests.get(url, params=params, timeout=20)
-    response.raise_for_status()
+def _safe_get(url: str, params: dict[str, Any], deadline: Deadline | None = None) -> dict[str, Any]:
+    try:
+        response = http_client.get('google_places', url, deadline=deadline, params=params)
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        raise GooglePlacesUnavailable('No fue posible consultar Google Places.') from exc
+    return response.json()
+
+
+async def _safe_get_async(url: str, params: dict[str, Any], deadline: Deadline | None = None) -> dict[str, Any]:
+    try:
+        response = await http_client.async_get('google_places', url, deadline=deadline, params=params)
+        response.raise_for_status()
+    except httpx.HTTPError as exc:
+        raise GooglePlacesUnavailable('No fue posible consultar Google Places.') from exc
     return response.json()
 
 
-def _build_maps_url(place_id: str) -> str:
+def build_maps_url(place_id: str) -> str:
     return f'https://www.google.com/maps/search/?api=1&query=google&query_place_id={quote_plus(place_id)}'
 
 
-def _build_photo_url(photo_reference: str) -> str:
-    return (
-        'https://maps.googleapis.com/maps/api/place/photo?maxwidth=1200'
-        f'&photo_reference={quote_plus(photo_reference)}&key={settings.GOOGLE_PLACES_API_KEY}'
-    )
+def build_photo_url(photo_reference: str, size: str = 'card') -> str:
+    return photo_cache.photo_url(photo_reference, size)
 
 
-def search_places(query: str, city: str, limit: int = 3, lat: float | None = None, lng: float | None = None) -> list[dict[str, Any]]:
-    if not settings.GOOGLE_PLACES_API_KEY:
-        raise GooglePlacesAPIError('GOOGLE_PLACES_API_KEY no configurada.')
+def _normalize_place(place: dict[str, Any]) -> dict[str, Any]:
+    photo_reference = None
+    photos = place.get('photos') or []
+    if photos:
+        photo_reference = photos[0].get('photo_reference')
+
+    price_level = place.get('price_level')
+    return {
+        'name': place.get('name', 'Lugar recomendado'),
+        'place_id': place.get('place_id', ''),
+        'rating': place.get('rating'),
+        'user_ratings_total': place.get('user_ratings_total'),
+        'price_level': price_level,
+        'estimated_cost_cop': price_level_to_cop(price_level),
+        'address': place.get('formatted_address') or place.get('vicinity', ''),
+        'photo_reference': photo_reference,
+        'photo_url': build_photo_url(photo_reference) if photo_reference else '',
+        'maps_url': build_maps_url(place.get('place_id', '')),
+        'raw_payload': place,
+    }
 
+
+def _prepare_search(query: str, city: str, lat: float | None, lng: float | None) -> tuple[dict[str, Any], str, str, str]:
     full_query = f'{query} en {city}' if city else query
-    params = {'query': full_query, 'language': 'es', 'region': 'co', 'key': settings.GOOGLE_PLACES_API_KEY}
+    params = {'query': full_query, 'language': SEARCH_LANGUAGE, 'region': SEARCH_REGION, 'key': settings.GOOGLE_PLACES_API_KEY}
+    radius = None
     if lat is not None and lng is not None:
-        params.update({'location': f'{lat},{lng}', 'radius': 6500})
-    payload = _safe_get(TEXT_SEARCH_URL, params)
+        radius = SEARCH_RADIUS_METERS
+        params.update({'location': f'{lat},{lng}', 'radius': radius})
+    cache_key, geo_cell = places_cache.build_cache_key(query, city, SEARCH_LANGUAGE, SEARCH_REGION, lat, lng, radius)
+    return params, full_query, cache_key, geo_cell
+
 
+def _places_from_payload(payload: dict[str, Any]) -> list[dict[str, Any]]:
     status = payload.get('status')
     if status == 'ZERO_RESULTS':
         return []
     if status != 'OK':
         raise GooglePlacesAPIError(f'Google Places respondió {status}.')
+    return [_normalize_place(place) for place in payload.get('results', [])]
+
+
+def search_places(
+    query: str,
+    city: str,
+    limit: int | None = 3,
+    lat: float | None = None,
+    lng: float | None = None,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    if not settings.GOOGLE_PLACES_API_KEY:
+        raise GooglePlacesAPIError('GOOGLE_PLACES_API_KEY no configurada.')
+
+    params, full_query, cache_key, geo_cell = _prepare_search(query, city, lat, lng)
+    cached = places_cache.get_cached_results(cache_key)
+    if cached is not None:
+        return cached[:limit]
+
+    # Cache the whole page so later searches with a larger limit still hit.
+    places = _places_from_payload(_safe_get(TEXT_SEARCH_URL, params, deadline))
+    places_cache.store_results(cache_key, full_query, geo_cell, places)
+    return places[:limit]
+
+
+async def search_places_async(
+    query: str,
+    city: str,
+    limit: int | None = 3,
+    lat: float | None = None,
+    lng: float | None = None,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    if not settings.GOOGLE_PLACES_API_KEY:
+        raise GooglePlacesAPIError('GOOGLE_PLACES_API_KEY no configurada.')
+
+    params, full_query, cache_key, geo_cell = _prepare_search(query, city, lat, lng)
+    cached = await sync_to_async(places_cache.get_cached_results)(cache_key)
+    if cached is not None:
+        return cached[:limit]
 
-    places = []
-    for place in payload.get('results', [])[:limit]:
-        photo_reference = None
-        photos = place.get('photos') or []
-        if photos:
-            photo_reference = photos[0].get('photo_reference')
-
-        price_level = place.get('price_level')
-        places.append(
-            {
-                'name': place.get('name', 'Lugar recomendado'),
-                'place_id': place.get('place_id', ''),
-                'rating': place.get('rating'),
-                'user_ratings_total': place.get('user_ratings_total'),
-                'price_level': price_level,
-                'estimated_cost_cop': price_level_to_cop(price_level),
-                'address': place.get('formatted_address') or place.get('vicinity', ''),
-                'photo_reference': photo_reference,
-                'photo_url': _build_photo_url(photo_reference) if photo_reference else '',
-                'maps_url': _build_maps_url(place.get('place_id', '')),
-                'raw_payload': place,
-            }
-        )
-    return places
+    places = _places_from_payload(await _safe_get_async(TEXT_SEARCH_URL, params, deadline))
+    await sync_to_async(places_cache.store_results)(cache_key, full_query, geo_cell, places)
+    return places[:limit]
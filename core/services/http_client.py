@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.services.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ServiceConfig:
+    timeout: float
+    retries: int = 0
+    backoff_factor: float = 0.3
+    retry_reads: bool = True
+    pool_maxsize: int = 10
+
+
+SERVICES = {
+    'google_places': ServiceConfig(timeout=20, retries=2),
+    'google_geocoding': ServiceConfig(timeout=15, retries=1),
+    'nominatim': ServiceConfig(timeout=15, retries=0),
+    # Only reconnect for OpenRouter: a read retry would resend a slow completion.
+    'openrouter': ServiceConfig(timeout=35, retries=1, retry_reads=False),
+}
+
+TimingHook = Callable[[str, str, str, int | None, float], None]
+
+_timing_hooks: list[TimingHook] = []
+_local = threading.local()
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def add_timing_hook(hook: TimingHook) -> None:
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: TimingHook) -> None:
+    if hook in _timing_hooks:
+        _timing_hooks.remove(hook)
+
+
+def _log_timing(service: str, method: str, url: str, status: int | None, elapsed: float) -> None:
+    logger.debug('%s %s %s -> %s in %.0f ms', service, method, url, status, elapsed * 1000)
+
+
+add_timing_hook(_log_timing)
+
+
+def _build_session(config: ServiceConfig, retries: int) -> requests.Session:
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries if config.retry_reads else 0,
+        status=retries if config.retry_reads else 0,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=None,
+        backoff_factor=config.backoff_factor,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _retries(service: str, deadline: Deadline | None) -> int:
+    # Each retry may take a full timeout again, so a call bound to a deadline gets a single
+    # attempt sized to the remaining budget instead of up to (retries + 1) times it.
+    return 0 if deadline is not None else SERVICES[service].retries
+
+
+def get_session(service: str, deadline: Deadline | None = None) -> requests.Session:
+    # requests.Session is not documented as thread-safe, so every thread
+    # (gunicorn request threads, the Places pool) keeps its own pooled session.
+    sessions = getattr(_local, 'sessions', None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+    key = (service, _retries(service, deadline))
+    if key not in sessions:
+        sessions[key] = _build_session(SERVICES[service], key[1])
+    return sessions[key]
+
+
+def _run_timing_hooks(service: str, method: str, url: str, status: int | None, elapsed: float) -> None:
+    endpoint = urlsplit(url)._replace(query='').geturl()
+    for hook in list(_timing_hooks):
+        try:
+            hook(service, method, endpoint, status, elapsed)
+        except Exception:
+            logger.exception('HTTP timing hook failed')
+
+
+def _timeout(service: str, deadline: Deadline | None) -> float:
+    cap = SERVICES[service].timeout
+    return deadline.timeout(cap) if deadline is not None else cap
+
+
+def request(service: str, method: str, url: str, deadline: Deadline | None = None, **kwargs) -> requests.Response:
+    kwargs.setdefault('timeout', _timeout(service, deadline))
+    status = None
+    started = time.perf_counter()
+    try:
+        response = get_session(service, deadline).request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        _run_timing_hooks(service, method, url, status, time.perf_counter() - started)
+
+
+def get(service: str, url: str, deadline: Deadline | None = None, **kwargs) -> requests.Response:
+    return request(service, 'GET', url, deadline=deadline, **kwargs)
+
+
+def post(service: str, url: str, deadline: Deadline | None = None, **kwargs) -> requests.Response:
+    return request(service, 'POST', url, deadline=deadline, **kwargs)
+
+
+def get_async_client(service: str, deadline: Deadline | None = None) -> httpx.AsyncClient:
+    # httpx clients are bound to the event loop that opened their connections,
+    # so each running loop (one per ASGI worker) gets its own pooled clients.
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    key = (service, _retries(service, deadline))
+    if key not in clients:
+        config = SERVICES[service]
+        transport = httpx.AsyncHTTPTransport(retries=key[1])
+        clients[key] = httpx.AsyncClient(
+            transport=transport,
+            timeout=config.timeout,
+            limits=httpx.Limits(max_connections=config.pool_maxsize * 10, max_keepalive_connections=config.pool_maxsize),
+        )
+    return clients[key]
+
+
+async def async_request(service: str, method: str, url: str, deadline: Deadline | None = None, **kwargs) -> httpx.Response:
+    if deadline is not None:
+        kwargs.setdefault('timeout', _timeout(service, deadline))
+    status = None
+    started = time.perf_counter()
+    try:
+        response = await get_async_client(service, deadline).request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        _run_timing_hooks(service, method, url, status, time.perf_counter() - started)
+
+
+async def async_get(service: str, url: str, deadline: Deadline | None = None, **kwargs) -> httpx.Response:
+    return await async_request(service, 'GET', url, deadline=deadline, **kwargs)
+
+
+async def async_post(service: str, url: str, deadline: Deadline | None = None, **kwargs) -> httpx.Response:
+    return await async_request(service, 'POST', url, deadline=deadline, **kwargs)
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.db.models.functions import Greatest
+
+from core.models import Conversation, ConversationMember, Message
+
+
+def preview(body: str) -> str:
+    return ' '.join(body.split())[:ConversationMember.PREVIEW_LENGTH]
+
+
+def ensure_members(conversation: Conversation) -> None:
+    ConversationMember.objects.bulk_create(
+        [
+            ConversationMember(conversation=conversation, user_id=conversation.user1_id, other_user_id=conversation.user2_id),
+            ConversationMember(conversation=conversation, user_id=conversation.user2_id, other_user_id=conversation.user1_id),
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def rebuild_members(conversation: Conversation) -> None:
+    last = conversation.messages.order_by('-created_at').only('body', 'created_at').first()
+    unread = conversation.messages.filter(is_read=False)
+    for user_id, other_id in ((conversation.user1_id, conversation.user2_id), (conversation.user2_id, conversation.user1_id)):
+        ConversationMember.objects.update_or_create(
+            conversation=conversation,
+            user_id=user_id,
+            defaults={
+                'other_user_id': other_id,
+                'last_message_at': last.created_at if last else None,
+                'last_message_preview': preview(last.body) if last else '',
+                'unread_count': unread.filter(sender_id=other_id).count(),
+            },
+        )
+
+
+def record_message(message: Message) -> None:
+    # A single UPDATE bumps both rows; the counter increments in SQL so concurrent sends never lose one.
+    with transaction.atomic():
+        updated = ConversationMember.objects.filter(conversation_id=message.conversation_id).update(
+            last_message_at=message.created_at,
+            last_message_preview=preview(message.body),
+            unread_count=Case(
+                When(~Q(user_id=message.sender_id), then=F('unread_count') + 1),
+                default=F('unread_count'),
+                output_field=PositiveIntegerField(),
+            ),
+        )
+        if updated < 2:
+            rebuild_members(message.conversation)
+
+
+def mark_read(conversation: Conversation, user, message_ids: list[int] | None = None) -> int:
+    with transaction.atomic():
+        unread = Message.objects.filter(conversation=conversation, is_read=False).exclude(sender=user)
+        if message_ids is not None:
+            unread = unread.filter(id__in=message_ids)
+        count = unread.update(is_read=True)
+        if count:
+            member = ConversationMember.objects.filter(conversation=conversation, user=user)
+            if message_ids is None:
+                member.update(unread_count=0)
+            else:
+                member.update(unread_count=Greatest(F('unread_count') - count, 0, output_field=PositiveIntegerField()))
+    return count
@@ -0,0 +1,334 @@
+import re
+
+from core.services import gazetteer
+from core.services.text import normalize_text, parse_amount
+
+# Default windows, keyed by the period a prompt mentions.
+WINDOWS = {
+    'manana': {'label': 'Mañana', 'start': '08:00', 'end': '12:00'},
+    'mediodia': {'label': 'Mediodía', 'start': '12:00', 'end': '15:00'},
+    'tarde': {'label': 'Tarde', 'start': '15:00', 'end': '18:30'},
+    'noche': {'label': 'Noche', 'start': '19:00', 'end': '23:30'},
+}
+PERIOD_ORDER = ['manana', 'mediodia', 'tarde', 'noche']
+
+PERIOD_WORDS = {
+    'por la manana': 'manana',
+    'en la manana': 'manana',
+    'esta manana': 'manana',
+    'desayuno': 'manana',
+    'desayunar': 'manana',
+    'brunch': 'manana',
+    'mediodia': 'mediodia',
+    'almuerzo': 'mediodia',
+    'almorzar': 'mediodia',
+    'por la tarde': 'tarde',
+    'en la tarde': 'tarde',
+    'esta tarde': 'tarde',
+    'tarde': 'tarde',
+    'atardecer': 'tarde',
+    'por la noche': 'noche',
+    'en la noche': 'noche',
+    'esta noche': 'noche',
+    'noche': 'noche',
+    'cena': 'noche',
+    'cenar': 'noche',
+    'madrugada': 'noche',
+}
+
+# Keyword -> (Google Places query term, period the place usually fits).
+PLACE_WORDS = {
+    'cafe': ('cafe', 'tarde'),
+    'cafes': ('cafe', 'tarde'),
+    'cafeteria': ('cafe', 'tarde'),
+    'panaderia': ('bakery', 'manana'),
+    'desayuno': ('breakfast', 'manana'),
+    'desayunar': ('breakfast', 'manana'),
+    'brunch': ('brunch', 'manana'),
+    'almuerzo': ('restaurant', 'mediodia'),
+    'restaurante': ('restaurant', 'noche'),
+    'restaurantes': ('restaurant', 'noche'),
+    'comer': ('restaurant', 'mediodia'),
+    'comida': ('restaurant', 'mediodia'),
+    'cena': ('restaurant', 'noche'),
+    'cenar': ('restaurant', 'noche'),
+    'pizza': ('pizza', 'noche'),
+    'hamburguesa': ('burger', 'noche'),
+    'hamburguesas': ('burger', 'noche'),
+    'sushi': ('sushi', 'noche'),
+    'helado': ('ice_cream', 'tarde'),
+    'helados': ('ice_cream', 'tarde'),
+    'heladeria': ('ice_cream', 'tarde'),
+    'postre': ('dessert', 'tarde'),
+    'postres': ('dessert', 'tarde'),
+    'parque': ('park', 'tarde'),
+    'parques': ('park', 'tarde'),
+    'caminar': ('park', 'tarde'),
+    'mirador': ('mirador', 'tarde'),
+    'museo': ('museum', 'tarde'),
+    'museos': ('museum', 'tarde'),
+    'galeria': ('art_gallery', 'tarde'),
+    'teatro': ('theater', 'noche'),
+    'cine': ('movie_theater', 'noche'),
+    'centro comercial': ('shopping_mall', 'tarde'),
+    'compras': ('shopping_mall', 'tarde'),
+    'bar': ('bar', 'noche'),
+    'bares': ('bar', 'noche'),
+    'coctel': ('cocktail bar', 'noche'),
+    'cocteles': ('cocktail bar', 'noche'),
+    'cerveza': ('brewery', 'noche'),
+    'cervezas': ('brewery', 'noche'),
+    'cerveceria': ('brewery', 'noche'),
+    'discoteca': ('night_club', 'noche'),
+    'bailar': ('night_club', 'noche'),
+    'salsa': ('salsa bar', 'noche'),
+    'karaoke': ('karaoke', 'noche'),
+    'musica en vivo': ('live music', 'noche'),
+    'concierto': ('live music', 'noche'),
+}
+
+GROUP_WORDS = {
+    'amigos': 'amigos',
+    'amigas': 'amigos',
+    'parche': 'amigos',
+    'pareja': 'pareja',
+    'novia': 'pareja',
+    'novio': 'pareja',
+    'cita': 'pareja',
+    'familia': 'familia',
+    'ninos': 'familia',
+    'hijos': 'familia',
+    'solo': 'solo',
+    'sola': 'solo',
+    'companeros': 'colegas',
+    'trabajo': 'colegas',
+}
+
+MOOD_WORDS = {
+    'chill': ('chill', 'chill'),
+    'tranquilo': ('chill', 'tranquilo'),
+    'tranqui': ('chill', 'tranquilo'),
+    'relajado': ('chill', 'tranquilo'),
+    'romantico': ('romántico', 'romántico'),
+    'romantica': ('romántico', 'romántico'),
+    'rumba': ('fiestero', 'rumba'),
+    'fiesta': ('fiestero', 'rumba'),
+    'parrandear': ('fiestero', 'rumba'),
+    'aventura': ('aventurero', 'aventura'),
+    'cultural': ('cultural', 'cultural'),
+    'cultura': ('cultural', 'cultural'),
+    'elegante': ('elegante', 'elegante'),
+    'barato': ('económico', 'económico'),
+    'economico': ('económico', 'económico'),
+}
+
+# Words that carry no meaning for the plan; anything else unrecognised makes the parse less certain.
+FILLER_WORDS = {
+    'a', 'al', 'algo', 'alguna', 'algun', 'bueno', 'buen', 'busco', 'con', 'de', 'del', 'el', 'en', 'es', 'esta',
+    'este', 'hoy', 'ir', 'la', 'las', 'lo', 'los', 'luego', 'mas', 'me', 'mi', 'mis', 'para', 'plan', 'planes',
+    'por', 'porfa', 'favor', 'pesos', 'cop', 'presupuesto', 'quiero', 'que', 'recomienda', 'recomiendame', 'salir',
+    'se', 'sitio', 'sitios', 'lugar', 'lugares', 'un', 'una', 'unos', 'unas', 'y', 'o', 'despues', 'tipo', 'rico',
+    'ricos', 'mil', 'k', 'millon', 'millones', 'hasta', 'maximo', 'gastar', 'entre', 'tomar', 'ver', 'dia', 'lucas',
+}
+
+_BUDGET_RE = re.compile(r'\$?\s*(\d[\d.,]*)\s*(millones|millón|millon|mil|lucas|k)?\b')
+_MULTIPLIERS = {
+    'k': 1_000,
+    'mil': 1_000,
+    'lucas': 1_000,
+    'millon': 1_000_000,
+    'millón': 1_000_000,
+    'millones': 1_000_000,
+}
+# Words that flip the meaning of the word after them ("sin gastar mucho", "no quiero rumba").
+NEGATION_WORDS = {'sin', 'no', 'ni', 'nada', 'nunca', 'evitar', 'evitando'}
+
+# Words that start a new clause; a place word prefers a period mentioned in its own clause.
+CLAUSE_BREAKS = {'y', 'e', 'luego', 'despues', 'pero'}
+_HOUR_RE = re.compile(r'\b(?:a las|desde las|tipo)\s+(\d{1,2})(?:\s+\d{2})?\s*(am|pm)?\b')
+DEFAULT_BUDGET_COP = 100_000
+
+
+def _phrases(tokens: list[str], lexicon: dict) -> list[tuple[int, int, str]]:
+    # Longest-first match of single and multi-word lexicon entries; returns (start, end, key).
+    found = []
+    idx = 0
+    while idx < len(tokens):
+        for size in (3, 2, 1):
+            phrase = ' '.join(tokens[idx:idx + size])
+            if len(tokens[idx:idx + size]) == size and phrase in lexicon:
+                found.append((idx, idx + size, phrase))
+                idx += size
+                break
+        else:
+            idx += 1
+    return found
+
+
+def _budget(prompt: str) -> int | None:
+    # Separators are kept so "1.5 millones" and "150.000" can be told apart.
+    candidates = []
+    for digits, unit in _BUDGET_RE.findall(prompt.lower()):
+        value = int(parse_amount(digits) * _MULTIPLIERS.get(unit, 1))
+        # Small bare numbers are group sizes or hours, not pesos.
+        if value >= 10_000:
+            candidates.append(value)
+    return max(candidates) if candidates else None
+
+
+def _hour_periods(text: str) -> list[tuple[int, int, str]]:
+    # Returns (start, end, period) token spans so hours can anchor nearby place words like period phrases.
+    periods = []
+    for match in _HOUR_RE.finditer(text):
+        hour, meridiem = match.groups()
+        value = int(hour) % 24
+        if meridiem == 'pm' and value < 12:
+            value += 12
+        elif not meridiem and value < 7:
+            value += 12
+        if value < 12:
+            period = 'manana'
+        elif value < 15:
+            period = 'mediodia'
+        elif value < 19:
+            period = 'tarde'
+        else:
+            period = 'noche'
+        start = len(text[:match.start()].split())
+        periods.append((start, start + len(match.group(0).split()), period))
+    return periods
+
+
+def _nearest_period(position: int, mentions: list[tuple[int, int, str]], fit: str, clauses: list[int]) -> str:
+    def distance(mention):
+        start, end, period = mention
+        gap = start - position if position < start else max(position - end + 1, 0)
+        return clauses[start] != clauses[position], gap, period != fit
+
+    return min(mentions, key=distance)[2]
+
+
+def _period_mentions(text: str, tokens: list[str]) -> list[tuple[int, int, str]]:
+    mentions = _hour_periods(text)
+    mentions.extend((start, end, PERIOD_WORDS[phrase]) for start, end, phrase in _phrases(tokens, PERIOD_WORDS))
+    return mentions
+
+
+def _place_periods(tokens: list[str], mentions: list[tuple[int, int, str]]) -> dict[str, str]:
+    # Each place type goes to the period written closest to it, or to the period it usually fits.
+    clauses = []
+    for token in tokens:
+        clauses.append((clauses[-1] if clauses else 0) + (token in CLAUSE_BREAKS))
+    place_types: dict[str, str] = {}
+    for start, _, phrase in _phrases(tokens, PLACE_WORDS):
+        query_term, fit = PLACE_WORDS[phrase]
+        place_types.setdefault(query_term, _nearest_period(start, mentions, fit, clauses) if mentions else fit)
+    return place_types
+
+
+def _city(tokens: list[str]) -> str:
+    names = gazetteer.municipality_names()
+    for idx, token in enumerate(tokens):
+        if token != 'en':
+            continue
+        for size in (3, 2, 1):
+            phrase = ' '.join(tokens[idx + 1:idx + 1 + size])
+            if phrase in names:
+                return names[phrase]
+    return ''
+
+
+def lexicon_terms(prompt: str) -> list[str]:
+    # Everything the parser would read as meaning, so two prompts that differ here never share a parse.
+    tokens = normalize_text(prompt.lower().replace('p.m.', 'pm').replace('a.m.', 'am')).split()
+    mentions = _period_mentions(' '.join(tokens), tokens)
+    terms = {f'period:{period}' for _, _, period in mentions}
+    # Pairing matters: "cafe en la tarde y bar en la noche" and the swapped prompt are different plans.
+    terms.update(f'place:{query_term}@{period}' for query_term, period in _place_periods(tokens, mentions).items())
+    terms.update(f'group:{GROUP_WORDS[token]}' for token in tokens if token in GROUP_WORDS)
+    terms.update(f'mood:{MOOD_WORDS[token][1]}' for token in tokens if token in MOOD_WORDS)
+    for idx, token in enumerate(tokens):
+        if token in NEGATION_WORDS:
+            following = [word for word in tokens[idx + 1:idx + 3] if word not in FILLER_WORDS]
+            terms.add(f'not:{following[0] if following else token}')
+    budget = _budget(prompt)
+    if budget:
+        terms.add(f'budget:{budget}')
+    return sorted(terms)
+
+
+def parse_prompt(prompt: str, city_name: str = '', user_preferences: dict | None = None) -> tuple[dict, float]:
+    preferences = user_preferences or {}
+    text = normalize_text(prompt.lower().replace('p.m.', 'pm').replace('a.m.', 'am'))
+    tokens = text.split()
+    recognized = set()
+
+    mentions = _period_mentions(text, tokens)
+    periods = {period for _, _, period in mentions}
+    place_types = _place_periods(tokens, mentions)
+    for lexicon in (PERIOD_WORDS, PLACE_WORDS):
+        for start, end, _ in _phrases(tokens, lexicon):
+            recognized.update(range(start, end))
+
+    group = ''
+    mood, vibes = '', []
+    for idx, token in enumerate(tokens):
+        if token in GROUP_WORDS and not group:
+            group = GROUP_WORDS[token]
+            recognized.add(idx)
+        if token in MOOD_WORDS:
+            mood = mood or MOOD_WORDS[token][0]
+            vibes.append(MOOD_WORDS[token][1])
+            recognized.add(idx)
+
+    detected_city = _city(tokens)
+    if detected_city:
+        city_tokens = normalize_text(detected_city).split()
+        for idx in range(len(tokens)):
+            if tokens[idx:idx + len(city_tokens)] == city_tokens:
+                recognized.update(range(idx, idx + len(city_tokens)))
+    # A city named in the prompt wins over the caller's default (usually the GPS or profile city).
+    city = detected_city or city_name
+
+    budget = _budget(prompt)
+
+    explicit_periods = bool(periods)
+    if not periods:
+        periods = set(place_types.values())
+    ordered_periods = [period for period in PERIOD_ORDER if period in periods]
+
+    types_by_period: dict[str, list[str]] = {period: [] for period in ordered_periods}
+    for query_term, period in place_types.items():
+        types_by_period[period].append(query_term)
+
+    window_vibes = list(dict.fromkeys(vibes)) or list(preferences.get('preferred_vibes') or [])
+    time_windows = [
+        {**WINDOWS[period], 'vibes': window_vibes, 'place_types': types_by_period[period][:3]} for period in ordered_periods
+    ]
+
+    parsed = {
+        'city': city,
+        'country': 'CO',
+        'budget_cop': budget or preferences.get('budget_max_cop') or DEFAULT_BUDGET_COP,
+        'mood': mood or 'alegre',
+        'group': group or 'amigos',
+        'time_windows': time_windows,
+        'constraints': {
+            'max_distance_km': 8,
+            'avoid': list(preferences.get('avoid') or []),
+            'prioritize': ['rating>=4.4', 'popular'],
+        },
+    }
+
+    if not time_windows:
+        return parsed, 0.0
+    content = [idx for idx, token in enumerate(tokens) if token not in FILLER_WORDS and not token.isdigit()]
+    coverage = sum(1 for idx in content if idx in recognized) / len(content) if content else 0.0
+    score = 0.0
+    score += 0.2 if city else 0.0
+    score += 0.3 if explicit_periods else (0.2 if time_windows else 0.0)
+    score += 0.3 if place_types and all(window['place_types'] for window in time_windows) else 0.0
+    score += 0.1 if budget else (0.05 if preferences.get('budget_max_cop') else 0.0)
+    score += 0.05 if group else 0.0
+    score += 0.05 if mood else 0.0
+    return parsed, round(score * coverage, 3)
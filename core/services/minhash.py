@@ -0,0 +1,39 @@
+import hashlib
+import random
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+_PRIME = (1 << 61) - 1
+# Fixed seed so signatures stored in the database stay comparable across processes and deploys.
+_rng = random.Random(1337)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def shingles(tokens: list[str], size: int = 3) -> set[str]:
+    # Word unigrams make the set order-insensitive; character n-grams absorb small typos.
+    result = set(tokens)
+    for token in tokens:
+        padded = f' {token} '
+        result.update(padded[idx:idx + size] for idx in range(max(len(padded) - size + 1, 1)))
+    return result
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def signature(features: set[str]) -> list[int]:
+    hashed = [_hash(feature) for feature in features] or [0]
+    return [min((a * value + b) % _PRIME for value in hashed) for a, b in _PERMUTATIONS]
+
+
+def band_keys(sig: list[int]) -> list[tuple[int, tuple[int, ...]]]:
+    return [(band, tuple(sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])) for band in range(BANDS)]
+
+
+def similarity(sig_a: list[int], sig_b: list[int]) -> float:
+    if len(sig_a) != len(sig_b) or not sig_a:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
@@ -1,8 +1,17 @@
 import json
 
+import httpx
 import requests
 from django.conf import settings
 
+from core.services import http_client, plan_schema
+from core.services.deadline import Deadline, DeadlineExceeded
+
+# A retry is only worth sending when a reasonable completion can still arrive before the deadline.
+RETRY_MIN_SECONDS = 8
+
+_RETRYABLE_ERRORS = (KeyError, IndexError, json.JSONDecodeError, plan_schema.PlanSchemaError, DeadlineExceeded)
+
 
 class OpenRouterError(Exception):
     pass
@@ -20,27 +29,38 @@ def _headers() -> dict[str, str]:
     return headers
 
 
-def _request(messages: list[dict[str, str]]) -> dict:
-    payload = {
+def _payload(messages: list[dict[str, str]]) -> dict:
+    return {
         'model': settings.OPENROUTER_MODEL,
         'messages': messages,
         'temperature': 0.2,
         'response_format': {'type': 'json_object'},
     }
-    response = requests.post(settings.OPENROUTER_BASE_URL, headers=_headers(), json=payload, timeout=35)
+
+
+def _request(messages: list[dict[str, str]], deadline: Deadline | None = None) -> dict:
+    response = http_client.post(
+        'openrouter', settings.OPENROUTER_BASE_URL, deadline=deadline, headers=_headers(), json=_payload(messages)
+    )
     response.raise_for_status()
     return response.json()
 
 
-def _extract_json(response_data: dict) -> dict:
-    content = response_data['choices'][0]['message']['content']
-    return json.loads(content)
+async def _request_async(messages: list[dict[str, str]], deadline: Deadline | None = None) -> dict:
+    response = await http_client.async_post(
+        'openrouter', settings.OPENROUTER_BASE_URL, deadline=deadline, headers=_headers(), json=_payload(messages)
+    )
+    response.raise_for_status()
+    return response.json()
 
 
-def parse_user_prompt(user_prompt: str, city_name: str = '', lat: float | None = None, lng: float | None = None, user_preferences: dict | None = None) -> dict:
-    if not settings.OPENROUTER_API_KEY:
-        raise OpenRouterError('OPENROUTER_API_KEY no configurada.')
+def _extract_plan(response_data: dict, user_prompt: str, city_name: str, user_preferences: dict | None) -> dict:
+    content = response_data['choices'][0]['message']['content']
+    # Repair chatty or malformed output locally; only a plan that can't be salvaged triggers a retry.
+    return plan_schema.coerce_plan(plan_schema.repair_json(content), user_prompt, city_name, user_preferences)
+
 
+def _build_messages(user_prompt: str, city_name: str, lat: float | None, lng: float | None, user_preferences: dict | None) -> list[dict[str, str]]:
     schema_hint = {
         'city': 'Medellín',
         'country': 'CO',
@@ -61,7 +81,7 @@ def parse_user_prompt(user_prompt: str, city_name: str = '', lat: float | None =
     if user_preferences:
         enriched_prompt += f"\nPreferencias usuario: {json.dumps(user_preferences, ensure_ascii=False)}"
 
-    messages = [
+    return [
         {
             'role': 'system',
             'content': (
@@ -73,13 +93,60 @@ def parse_user_prompt(user_prompt: str, city_name: str = '', lat: float | None =
         {'role': 'user', 'content': enriched_prompt},
     ]
 
+
+def _retry_messages(messages: list[dict[str, str]]) -> list[dict[str, str]]:
+    return messages + [
+        {'role': 'user', 'content': 'Devuelve SOLO JSON válido. Sin comentarios, sin texto adicional.'}
+    ]
+
+
+def _retry_allowed(deadline: Deadline | None) -> bool:
+    return deadline is None or deadline.allows(RETRY_MIN_SECONDS)
+
+
+def parse_user_prompt(
+    user_prompt: str,
+    city_name: str = '',
+    lat: float | None = None,
+    lng: float | None = None,
+    user_preferences: dict | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    if not settings.OPENROUTER_API_KEY:
+        raise OpenRouterError('OPENROUTER_API_KEY no configurada.')
+
+    messages = _build_messages(user_prompt, city_name, lat, lng, user_preferences)
+    try:
+        return _extract_plan(_request(messages, deadline), user_prompt, city_name, user_preferences)
+    except (requests.RequestException, *_RETRYABLE_ERRORS) as exc:
+        if not _retry_allowed(deadline):
+            raise OpenRouterError('OpenRouter no respondió a tiempo.') from exc
+        try:
+            return _extract_plan(_request(_retry_messages(messages), deadline), user_prompt, city_name, user_preferences)
+        except (requests.RequestException, *_RETRYABLE_ERRORS) as exc:
+            raise OpenRouterError('No fue posible obtener JSON válido desde OpenRouter.') from exc
+
+
+async def parse_user_prompt_async(
+    user_prompt: str,
+    city_name: str = '',
+    lat: float | None = None,
+    lng: float | None = None,
+    user_preferences: dict | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    if not settings.OPENROUTER_API_KEY:
+        raise OpenRouterError('OPENROUTER_API_KEY no configurada.')
+
+    messages = _build_messages(user_prompt, city_name, lat, lng, user_preferences)
     try:
-        return _extract_json(_request(messages))
-    except (requests.RequestException, KeyError, json.JSONDecodeError):
-        retry_messages = messages + [
-            {'role': 'user', 'content': 'Devuelve SOLO JSON válido. Sin comentarios, sin texto adicional.'}
-        ]
+        return _extract_plan(await _request_async(messages, deadline), user_prompt, city_name, user_preferences)
+    except (httpx.HTTPError, *_RETRYABLE_ERRORS) as exc:
+        if not _retry_allowed(deadline):
+            raise OpenRouterError('OpenRouter no respondió a tiempo.') from exc
         try:
-            return _extract_json(_request(retry_messages))
-        except (requests.RequestException, KeyError, json.JSONDecodeError) as exc:
+            return _extract_plan(
+                await _request_async(_retry_messages(messages), deadline), user_prompt, city_name, user_preferences
+            )
+        except (httpx.HTTPError, *_RETRYABLE_ERRORS) as exc:
             raise OpenRouterError('No fue posible obtener JSON válido desde OpenRouter.') from exc
@@ -0,0 +1,164 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.signing import Signer
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core.services import http_client, singleflight
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_PHOTO_URL = 'https://maps.googleapis.com/maps/api/place/photo'
+PHOTO_SIZES = {'thumb': 320, 'card': 640, 'full': 1200}
+JPEG_QUALITY = 80
+BROWSER_MAX_AGE = 365 * 24 * 60 * 60
+# Eviction trims the cache a little below the limit so it does not run on every write.
+EVICT_TO_RATIO = 0.9
+
+
+class PhotoUnavailable(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_state = {'bytes': None}
+
+
+def _signature(photo_reference: str) -> str:
+    # Only references we handed out can be proxied, so the endpoint cannot be used to spend our Places quota.
+    return Signer(salt='place-photo').signature(photo_reference)
+
+
+def photo_url(photo_reference: str, size: str = 'card') -> str:
+    return f"{reverse('place_photo', args=[photo_reference, size])}?s={_signature(photo_reference)}"
+
+
+def valid_signature(photo_reference: str, signature: str) -> bool:
+    return constant_time_compare(_signature(photo_reference), signature)
+
+
+def _root() -> Path:
+    return Path(settings.PHOTO_CACHE_DIR)
+
+
+def _sha(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def _ref_path(photo_reference: str, size: str) -> Path:
+    digest = _sha(f'{photo_reference}|{size}')
+    return _root() / 'refs' / digest[:2] / digest
+
+
+def blob_path(digest: str) -> Path:
+    return _root() / 'blobs' / digest[:2] / f'{digest}.jpg'
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _cached_digest(photo_reference: str, size: str) -> str | None:
+    try:
+        digest = _ref_path(photo_reference, size).read_text().strip()
+        # Touching the blob keeps its mtime as the last-use time for LRU eviction.
+        os.utime(blob_path(digest))
+    except (FileNotFoundError, ValueError):
+        return None
+    return digest
+
+
+def _fetch_original(photo_reference: str) -> bytes:
+    params = {'maxwidth': max(PHOTO_SIZES.values()), 'photo_reference': photo_reference, 'key': settings.GOOGLE_PLACES_API_KEY}
+    try:
+        response = http_client.get('google_places', GOOGLE_PHOTO_URL, params=params)
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        raise PhotoUnavailable('No fue posible descargar la foto.') from exc
+    return response.content
+
+
+def _resize(original: bytes, width: int) -> bytes:
+    try:
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(original)))
+    except (UnidentifiedImageError, OSError) as exc:
+        raise PhotoUnavailable('La foto no es una imagen válida.') from exc
+    image = image.convert('RGB')
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def _store_all_sizes(photo_reference: str) -> dict[str, str]:
+    original = _fetch_original(photo_reference)
+    digests = {}
+    written = 0
+    for size, width in PHOTO_SIZES.items():
+        data = _resize(original, width)
+        digest = hashlib.sha256(data).hexdigest()
+        if not blob_path(digest).exists():
+            _write_atomic(blob_path(digest), data)
+            written += len(data)
+        _write_atomic(_ref_path(photo_reference, size), digest.encode('ascii'))
+        digests[size] = digest
+    _account(written)
+    return digests
+
+
+def _blobs() -> list[tuple[Path, os.stat_result]]:
+    entries = []
+    for path in (_root() / 'blobs').glob('*/*.jpg'):
+        try:
+            entries.append((path, path.stat()))
+        except FileNotFoundError:
+            continue
+    return entries
+
+
+def _account(written: int) -> None:
+    with _lock:
+        if _state['bytes'] is None:
+            _state['bytes'] = sum(stat.st_size for _, stat in _blobs())
+        else:
+            _state['bytes'] += written
+        if _state['bytes'] > settings.PHOTO_CACHE_MAX_BYTES:
+            _state['bytes'] = _evict()
+
+
+def _evict() -> int:
+    # Ref files pointing at evicted blobs are left behind; a miss on them just refetches.
+    entries = sorted(_blobs(), key=lambda entry: entry[1].st_mtime)
+    total = sum(stat.st_size for _, stat in entries)
+    target = settings.PHOTO_CACHE_MAX_BYTES * EVICT_TO_RATIO
+    for path, stat in entries:
+        if total <= target:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        total -= stat.st_size
+    return total
+
+
+def get_photo(photo_reference: str, size: str) -> str:
+    digest = _cached_digest(photo_reference, size)
+    if digest is not None:
+        return digest
+    digests = singleflight.do(f'photo:{_sha(photo_reference)}', lambda: _store_all_sizes(photo_reference))
+    if not blob_path(digests[size]).exists():
+        digests = _store_all_sizes(photo_reference)
+    return digests[size]
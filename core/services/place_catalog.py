@@ -0,0 +1,153 @@
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.models import Place, PlaceTag
+from core.services import geohash, plan_document
+from core.services.google_places import build_maps_url, build_photo_url, price_level_to_cop
+from core.services.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+PLACE_PRECISION = 7
+# Tag rows carry a coarser cell (~5 km) so a lookup scans the user's cell and its eight neighbours.
+TAG_CELL_PRECISION = 5
+PLACE_FIELDS = [
+    'name',
+    'address',
+    'types',
+    'rating',
+    'user_ratings_total',
+    'price_level',
+    'lat',
+    'lng',
+    'geohash',
+    'city_slug',
+    'photo_reference',
+    'maps_url',
+    'fetched_at',
+]
+
+
+def tag_for(value: str) -> str:
+    return normalize_text(value).replace(' ', '_')[:60]
+
+
+def place_key(result: dict[str, Any]) -> str:
+    if result.get('place_id'):
+        return result['place_id']
+    # Places saved without a Google id still need one shared row per name and address.
+    digest = hashlib.sha1(f"{result.get('name', '')}|{result.get('address', '')}".lower().encode('utf-8')).hexdigest()
+    return f'local:{digest}'
+
+
+def _place_from_result(result: dict[str, Any], city_slug: str, now) -> Place:
+    # Fresh Google results carry these in raw_payload; places posted back from a slim plan carry them at the top level.
+    extra = plan_document.compact_place(result, ('lat', 'lng', 'types'))
+    lat, lng = extra.get('lat'), extra.get('lng')
+    return Place(
+        place_id=result['place_id'],
+        name=(result.get('name') or '')[:200],
+        address=(result.get('address') or '')[:255],
+        types=extra.get('types', []),
+        rating=result.get('rating'),
+        user_ratings_total=result.get('user_ratings_total'),
+        price_level=result.get('price_level'),
+        lat=lat,
+        lng=lng,
+        geohash=geohash.encode(lat, lng, PLACE_PRECISION) if lat is not None and lng is not None else '',
+        city_slug=city_slug,
+        photo_reference=result.get('photo_reference') or '',
+        maps_url=result.get('maps_url') or '',
+        fetched_at=now,
+    )
+
+
+def record_results(results: list[dict[str, Any]], place_types: list[str], city: str) -> None:
+    if not settings.PLACE_CATALOG_ENABLED:
+        return
+    now = timezone.now()
+    city_slug = slugify(city)
+    places = {result['place_id']: _place_from_result(result, city_slug, now) for result in results if result.get('place_id')}
+    if not places:
+        return
+    try:
+        Place.objects.bulk_create(
+            places.values(),
+            update_conflicts=True,
+            unique_fields=['place_id'],
+            update_fields=PLACE_FIELDS,
+        )
+        ids = dict(Place.objects.filter(place_id__in=places).values_list('place_id', 'id'))
+        query_tags = {tag_for(place_type) for place_type in place_types}
+        tags = []
+        for place_id, place in places.items():
+            cell = place.geohash[:TAG_CELL_PRECISION]
+            for tag in query_tags | {tag_for(value) for value in place.types}:
+                tags.append(PlaceTag(place_id=ids[place_id], tag=tag, cell=cell, city_slug=city_slug))
+        PlaceTag.objects.bulk_create(tags, ignore_conflicts=True)
+    except DatabaseError:
+        logger.warning('Place catalog write failed', exc_info=True)
+
+
+def link_places(results: list[dict[str, Any]], city: str) -> dict[str, Place]:
+    now = timezone.now()
+    city_slug = slugify(city)
+    places = {}
+    for result in results:
+        key = place_key(result)
+        places.setdefault(key, _place_from_result({**result, 'place_id': key}, city_slug, now))
+    # Existing rows are left alone: the catalog refreshes them from Google, not from saved plans.
+    Place.objects.bulk_create(places.values(), ignore_conflicts=True)
+    return Place.objects.in_bulk(list(places), field_name='place_id')
+
+
+def to_result(place: Place) -> dict[str, Any]:
+    return {
+        'name': place.name,
+        'place_id': place.place_id,
+        'rating': place.rating,
+        'user_ratings_total': place.user_ratings_total,
+        'price_level': place.price_level,
+        'estimated_cost_cop': price_level_to_cop(place.price_level),
+        'address': place.address,
+        'photo_reference': place.photo_reference or None,
+        'photo_url': build_photo_url(place.photo_reference) if place.photo_reference else '',
+        'maps_url': place.maps_url or build_maps_url(place.place_id),
+    }
+
+
+def find_places(
+    place_types: list[str],
+    city: str,
+    lat: float | None,
+    lng: float | None,
+    limit: int,
+    min_rating: float = 0,
+) -> list[dict[str, Any]]:
+    if not settings.PLACE_CATALOG_ENABLED or not place_types:
+        return []
+    tag_filter = {'tags__tag__in': [tag_for(place_type) for place_type in place_types]}
+    if lat is not None and lng is not None:
+        tag_filter['tags__cell__in'] = geohash.neighbors(geohash.encode(lat, lng, TAG_CELL_PRECISION))
+    elif city:
+        tag_filter['tags__city_slug'] = slugify(city)
+    else:
+        return []
+    fresh_after = timezone.now() - timedelta(seconds=settings.PLACE_CATALOG_MAX_AGE)
+    try:
+        places = list(
+            Place.objects.filter(fetched_at__gt=fresh_after, rating__gte=min_rating, **tag_filter)
+            .order_by('-rating', '-user_ratings_total')
+            .distinct()[:limit]
+        )
+    except DatabaseError:
+        logger.warning('Place catalog lookup failed', exc_info=True)
+        return []
+    return [to_result(place) for place in places]
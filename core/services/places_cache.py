@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import random
+import threading
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from core.models import PlacesSearchCache
+from core.services import geohash
+from core.services.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def build_cache_key(
+    query: str,
+    city: str,
+    language: str,
+    region: str,
+    lat: float | None = None,
+    lng: float | None = None,
+    radius: int | None = None,
+) -> tuple[str, str]:
+    geo_cell = ''
+    if lat is not None and lng is not None and radius:
+        geo_cell = geohash.encode(lat, lng, geohash.precision_for_radius(radius))
+    raw_key = '|'.join([normalize_text(query), normalize_text(city), language, region, geo_cell])
+    return hashlib.sha256(raw_key.encode('utf-8')).hexdigest(), geo_cell
+
+
+def _record(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def get_cached_results(cache_key: str) -> list[dict[str, Any]] | None:
+    if not settings.PLACES_CACHE_ENABLED:
+        return None
+    now = timezone.now()
+    try:
+        results = (
+            PlacesSearchCache.objects.filter(cache_key=cache_key, expires_at__gt=now)
+            .values_list('results', flat=True)
+            .first()
+        )
+        if results is None:
+            _record('misses')
+            return None
+        PlacesSearchCache.objects.filter(cache_key=cache_key).update(hits=F('hits') + 1, last_used_at=now)
+    except DatabaseError:
+        logger.warning('Places cache lookup failed', exc_info=True)
+        return None
+    _record('hits')
+    return results
+
+
+def store_results(cache_key: str, query: str, geo_cell: str, results: list[dict[str, Any]]) -> None:
+    if not settings.PLACES_CACHE_ENABLED:
+        return
+    now = timezone.now()
+    values = {
+        'query': query[:255],
+        'geo_cell': geo_cell,
+        'results': results,
+        'expires_at': now + timedelta(seconds=settings.PLACES_CACHE_TTL),
+        'last_used_at': now,
+    }
+    try:
+        updated = PlacesSearchCache.objects.filter(cache_key=cache_key).update(misses=F('misses') + 1, **values)
+        if not updated:
+            try:
+                PlacesSearchCache.objects.create(cache_key=cache_key, misses=1, **values)
+            except IntegrityError:
+                # Another worker stored the same search first; its copy is just as fresh.
+                pass
+            # Like DatabaseCache's CULL_FREQUENCY: only about one insert in N pays for the
+            # expired-row DELETE and the COUNT, so the table may briefly run N rows over the cap.
+            if random.randrange(max(1, settings.PLACES_CACHE_CULL_FREQUENCY)) == 0:
+                _evict()
+    except DatabaseError:
+        logger.warning('Places cache write failed', exc_info=True)
+
+
+def _evict() -> None:
+    PlacesSearchCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    overflow = PlacesSearchCache.objects.count() - settings.PLACES_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = list(PlacesSearchCache.objects.order_by('last_used_at').values_list('id', flat=True)[:overflow])
+        PlacesSearchCache.objects.filter(id__in=stale_ids).delete()
+
+
+def cache_stats() -> dict[str, int]:
+    with _stats_lock:
+        process_stats = dict(_stats)
+    totals = PlacesSearchCache.objects.aggregate(hits=Sum('hits'), misses=Sum('misses'))
+    return {
+        'process_hits': process_stats['hits'],
+        'process_misses': process_stats['misses'],
+        'total_hits': totals['hits'] or 0,
+        'total_misses': totals['misses'] or 0,
+        'entries': PlacesSearchCache.objects.count(),
+    }
@@ -0,0 +1,100 @@
+from typing import Any
+
+DOCUMENT_VERSION = 1
+PARSED_FIELDS = ('city', 'country', 'mood', 'group', 'budget_cop', 'constraints')
+WINDOW_FIELDS = ('label', 'start', 'end', 'vibes', 'place_types')
+# photo_url is a signed proxy link rebuilt from photo_reference on read.
+PLACE_FIELDS = (
+    'place_id',
+    'name',
+    'rating',
+    'user_ratings_total',
+    'price_level',
+    'estimated_cost_cop',
+    'address',
+    'photo_reference',
+    'maps_url',
+    'lat',
+    'lng',
+    'types',
+)
+LOCATION_FIELDS = ('city_name', 'country_code')
+SLIM_PLACE_FIELDS = (
+    'place_id',
+    'name',
+    'rating',
+    'user_ratings_total',
+    'price_level',
+    'estimated_cost_cop',
+    'address',
+    'photo_reference',
+    'photo_url',
+    'maps_url',
+    'lat',
+    'lng',
+    'types',
+)
+RESPONSE_PLACE_FIELDS = (*SLIM_PLACE_FIELDS, 'raw_payload')
+
+
+def _pick(data: Any, fields: tuple[str, ...]) -> dict[str, Any]:
+    if not isinstance(data, dict):
+        return {}
+    return {field: data[field] for field in fields if data.get(field) not in (None, '', [], {})}
+
+
+def compact_place(place: dict[str, Any], fields: tuple[str, ...] = PLACE_FIELDS) -> dict[str, Any]:
+    raw_payload = place.get('raw_payload') or {}
+    location = raw_payload.get('geometry', {}).get('location', {})
+    return _pick({'lat': location.get('lat'), 'lng': location.get('lng'), 'types': raw_payload.get('types'), **place}, fields)
+
+
+def _compact_window(window: Any, with_places: bool) -> dict[str, Any]:
+    compacted = _pick(window, WINDOW_FIELDS)
+    if with_places:
+        compacted['places'] = [compact_place(place) for place in (window or {}).get('places') or [] if isinstance(place, dict)]
+    return compacted
+
+
+def compact_plan(payload: dict[str, Any]) -> dict[str, Any]:
+    parsed = payload.get('parsed_request') or {}
+    return {
+        'version': DOCUMENT_VERSION,
+        'prompt': str(payload.get('prompt') or ''),
+        'parsed_request': {
+            **_pick(parsed, PARSED_FIELDS),
+            'time_windows': [_compact_window(window, False) for window in parsed.get('time_windows') or []],
+        },
+        'resolved_location': _pick(payload.get('resolved_location'), LOCATION_FIELDS),
+        'time_windows': [_compact_window(window, True) for window in payload.get('time_windows') or [] if window],
+    }
+
+
+def is_compact(document: Any) -> bool:
+    return isinstance(document, dict) and document.get('version') == DOCUMENT_VERSION
+
+
+def response_fields(value: str | None) -> tuple[str, ...]:
+    requested = {field.strip() for field in (value or '').split(',') if field.strip()}
+    if not requested:
+        return SLIM_PLACE_FIELDS
+    # place_id is always kept: the client posts places back to api_save_plan.
+    return tuple(field for field in RESPONSE_PLACE_FIELDS if field in requested or field == 'place_id')
+
+
+def project_window(window: dict[str, Any] | None, fields: tuple[str, ...]) -> dict[str, Any] | None:
+    if not window:
+        return window
+    return {**window, 'places': [compact_place(place, fields) for place in window.get('places') or []]}
+
+
+def project_plan(result: dict[str, Any], fields: tuple[str, ...]) -> dict[str, Any]:
+    if not result or 'time_windows' not in result:
+        return result
+    return {**result, 'time_windows': [project_window(window, fields) for window in result['time_windows']]}
+
+
+def project_event(event: dict[str, Any], fields: tuple[str, ...]) -> dict[str, Any]:
+    if event.get('window'):
+        return {**event, 'window': project_window(event['window'], fields)}
+    return event
@@ -0,0 +1,174 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import PlanJob
+from core.services.planner import PlanGenerationError, iter_plan_events
+
+logger = logging.getLogger(__name__)
+
+
+class JobReleased(Exception):
+    pass
+
+
+def enqueue(context: dict, user=None, session_key: str = '') -> PlanJob:
+    authenticated = user is not None and user.is_authenticated
+    return PlanJob.objects.create(
+        user=user if authenticated else None,
+        session_key='' if authenticated else session_key,
+        request_payload=context,
+        max_attempts=settings.PLAN_JOBS_MAX_ATTEMPTS,
+    )
+
+
+def can_view(job: PlanJob, user, session_key: str | None) -> bool:
+    if job.user_id:
+        return job.user_id == user.id
+    return bool(job.session_key) and job.session_key == session_key
+
+
+def _free_slot() -> int | None:
+    taken = set(PlanJob.objects.filter(status=PlanJob.Status.RUNNING, slot__isnull=False).values_list('slot', flat=True))
+    return next((slot for slot in range(settings.PLAN_JOBS_MAX_RUNNING) if slot not in taken), None)
+
+
+def claim_next(worker_id: str) -> PlanJob | None:
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            slot = _free_slot()
+            if slot is None:
+                return None
+            candidates = PlanJob.objects.filter(status=PlanJob.Status.QUEUED, available_at__lte=now).order_by('available_at', 'created_at')
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            job = candidates.first()
+            if job is None:
+                return None
+            # The status filter makes the claim safe on backends without SKIP LOCKED too, and the
+            # unique running slot keeps two workers that both counted a free slot from exceeding the cap.
+            claimed = PlanJob.objects.filter(pk=job.pk, status=PlanJob.Status.QUEUED).update(
+                status=PlanJob.Status.RUNNING,
+                attempts=job.attempts + 1,
+                worker_id=worker_id,
+                slot=slot,
+                locked_at=now,
+                heartbeat_at=now,
+                updated_at=now,
+            )
+    except IntegrityError:
+        # Another worker took the same slot first; the next poll looks again.
+        return None
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def _owned(job: PlanJob):
+    return PlanJob.objects.filter(pk=job.pk, status=PlanJob.Status.RUNNING, worker_id=job.worker_id)
+
+
+def _save_progress(job: PlanJob) -> None:
+    now = timezone.now()
+    # A job released on shutdown or recovered as stale belongs to someone else now; stop writing to it.
+    if not _owned(job).update(result=job.result, heartbeat_at=now, updated_at=now):
+        raise JobReleased(job.pk)
+
+
+def _schedule_retry_or_fail(job: PlanJob, error: str, jobs=None) -> bool:
+    now = timezone.now()
+    fields = {'error': error, 'worker_id': '', 'updated_at': now}
+    if job.attempts < job.max_attempts:
+        fields.update(
+            status=PlanJob.Status.QUEUED,
+            available_at=now + timedelta(seconds=settings.PLAN_JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)),
+        )
+    else:
+        fields.update(status=PlanJob.Status.FAILED, finished_at=now)
+    jobs = _owned(job) if jobs is None else jobs
+    return bool(jobs.update(**fields))
+
+
+def run_job(job: PlanJob) -> None:
+    payload = job.request_payload
+    job.result = {'prompt': payload['prompt'], 'resolved_location': payload.get('resolved_location', {}), 'time_windows': []}
+    try:
+        events = iter_plan_events(
+            payload['prompt'],
+            city_name=payload.get('city_name', ''),
+            lat=payload.get('lat'),
+            lng=payload.get('lng'),
+            user_preferences=payload.get('user_preferences'),
+        )
+        for event in events:
+            if event['type'] == 'parsed':
+                job.result['parsed_request'] = event['parsed_request']
+                job.result['time_windows'] = [None] * len(event['parsed_request']['time_windows'])
+            else:
+                job.result['time_windows'][event['index']] = event['window']
+            _save_progress(job)
+    except JobReleased:
+        logger.info('Plan job %s was released while running; dropping this attempt', job.pk)
+        return
+    except PlanGenerationError as exc:
+        _schedule_retry_or_fail(job, str(exc))
+        return
+    except Exception as exc:
+        logger.exception('Plan job %s crashed', job.pk)
+        _schedule_retry_or_fail(job, f'Error inesperado: {exc.__class__.__name__}')
+        return
+
+    job.result['time_windows'] = [window for window in job.result['time_windows'] if window is not None]
+    now = timezone.now()
+    _owned(job).update(result=job.result, status=PlanJob.Status.DONE, error='', finished_at=now, updated_at=now)
+
+
+def heartbeat(worker_id: str) -> int:
+    now = timezone.now()
+    return PlanJob.objects.filter(status=PlanJob.Status.RUNNING, worker_id=worker_id).update(heartbeat_at=now, updated_at=now)
+
+
+def release_jobs(worker_id: str) -> int:
+    # A shutdown is not the job's fault, so the attempt it was on is handed back.
+    now = timezone.now()
+    return PlanJob.objects.filter(status=PlanJob.Status.RUNNING, worker_id=worker_id).update(
+        status=PlanJob.Status.QUEUED,
+        attempts=F('attempts') - 1,
+        worker_id='',
+        available_at=now,
+        updated_at=now,
+    )
+
+
+def recover_stale_jobs() -> int:
+    cutoff = timezone.now() - timedelta(seconds=settings.PLAN_JOBS_STALE_SECONDS)
+    stale_jobs = PlanJob.objects.filter(status=PlanJob.Status.RUNNING, heartbeat_at__lt=cutoff)
+    recovered = 0
+    for job in stale_jobs:
+        # Re-checking the heartbeat in the UPDATE skips a job whose worker woke up meanwhile.
+        if _schedule_retry_or_fail(job, 'El worker dejó de responder.', _owned(job).filter(heartbeat_at__lt=cutoff)):
+            logger.warning('Recovered stale plan job %s from worker %s', job.pk, job.worker_id)
+            recovered += 1
+    return recovered
+
+
+def purge_finished_jobs() -> int:
+    cutoff = timezone.now() - timedelta(seconds=settings.PLAN_JOBS_RETENTION_SECONDS)
+    deleted, _ = PlanJob.objects.filter(status__in=[PlanJob.Status.DONE, PlanJob.Status.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def job_status_payload(job: PlanJob) -> dict:
+    return {
+        'job_id': str(job.pk),
+        'status': job.status,
+        'attempts': job.attempts,
+        'result': job.result,
+        'error': job.error,
+    }
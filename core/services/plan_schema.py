@@ -0,0 +1,140 @@
+import json
+import re
+
+from core.services import local_parser
+from core.services.text import parse_amount
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.S | re.I)
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+_SINGLE_QUOTED_RE = re.compile(r"'((?:[^'\\]|\\.)*)'(?=\s*[:,}\]])")
+_BARE_KEY_RE = re.compile(r'([{,]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:')
+_PY_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_AMOUNT_RE = re.compile(r'(\d[\d.,]*)\s*(millones|millón|millon|mil|k)?\b', re.I)
+_MULTIPLIERS = {'k': 1_000, 'mil': 1_000, 'millon': 1_000_000, 'millón': 1_000_000, 'millones': 1_000_000}
+
+
+class PlanSchemaError(ValueError):
+    pass
+
+
+def _json_object_text(content: str) -> str:
+    fenced = _FENCE_RE.search(content)
+    if fenced:
+        content = fenced.group(1)
+    start = content.find('{')
+    end = content.rfind('}')
+    if start == -1:
+        raise PlanSchemaError('La respuesta no contiene un objeto JSON.')
+    if end < start:
+        # Truncated output: close whatever brackets are still open.
+        content = content[start:]
+        return content + _missing_closers(content)
+    return content[start:end + 1]
+
+
+def _missing_closers(text: str) -> str:
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+    return ('"' if in_string else '') + ''.join(reversed(stack))
+
+
+def _cleanup(text: str) -> str:
+    text = text.replace('“', '"').replace('”', '"').replace('‘', "'").replace('’', "'")
+    text = _SINGLE_QUOTED_RE.sub(lambda match: json.dumps(match.group(1)), text)
+    text = _BARE_KEY_RE.sub(r'\1"\2":', text)
+    text = re.sub(r'\b(True|False|None)\b', lambda match: _PY_LITERALS[match.group(1)], text)
+    return _TRAILING_COMMA_RE.sub(r'\1', text)
+
+
+def repair_json(content: str) -> dict:
+    if not isinstance(content, str):
+        raise PlanSchemaError('La respuesta no es texto.')
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        text = _json_object_text(content)
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                data = json.loads(_cleanup(text))
+            except json.JSONDecodeError as exc:
+                raise PlanSchemaError('No fue posible reparar el JSON.') from exc
+    if not isinstance(data, dict):
+        raise PlanSchemaError('La respuesta no es un objeto JSON.')
+    return data
+
+
+def _as_budget(value) -> int | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        match = _AMOUNT_RE.search(value.replace('$', ''))
+        if match:
+            return int(parse_amount(match.group(1)) * _MULTIPLIERS.get((match.group(2) or '').lower(), 1))
+    return None
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _coerce_window(window) -> dict | None:
+    if not isinstance(window, dict):
+        return None
+    coerced = dict(window)
+    coerced['label'] = str(window.get('label') or window.get('name') or 'Plan')
+    coerced['vibes'] = [str(item) for item in _as_list(window.get('vibes'))]
+    coerced['place_types'] = [str(item) for item in _as_list(window.get('place_types') or window.get('places'))]
+    return coerced
+
+
+def coerce_plan(data: dict, prompt: str = '', city_name: str = '', user_preferences: dict | None = None) -> dict:
+    preferences = user_preferences or {}
+    plan = dict(data)
+
+    windows = plan.get('time_windows')
+    if isinstance(windows, dict):
+        windows = [windows]
+    windows = [window for window in (_coerce_window(item) for item in _as_list(windows)) if window]
+    if not windows and prompt:
+        # The model skipped the windows; the local parser can still infer them from the prompt.
+        windows = local_parser.parse_prompt(prompt, city_name, preferences)[0]['time_windows']
+    if not windows:
+        raise PlanSchemaError('time_windows debe contener al menos una franja horaria.')
+    plan['time_windows'] = windows
+
+    plan['budget_cop'] = _as_budget(plan.get('budget_cop')) or preferences.get('budget_max_cop') or local_parser.DEFAULT_BUDGET_COP
+    plan['city'] = str(plan.get('city') or city_name or '')
+    plan['country'] = str(plan.get('country') or 'CO')
+    plan['mood'] = str(plan.get('mood') or 'alegre')
+    plan['group'] = str(plan.get('group') or 'amigos')
+    constraints = plan.get('constraints')
+    if not isinstance(constraints, dict):
+        constraints = {}
+    constraints.setdefault('avoid', list(preferences.get('avoid') or []))
+    plan['constraints'] = constraints
+    return plan
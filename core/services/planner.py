@@ -1,7 +1,29 @@
+import asyncio
+import logging
+import time
 from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
 
-from core.services.google_places import GooglePlacesAPIError, search_places
-from core.services.openrouter_ai import OpenRouterError, parse_user_prompt
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from core.services import geohash, local_parser, place_catalog, prompt_cache, singleflight
+from core.services.google_places import (
+    GooglePlacesAPIError,
+    GooglePlacesUnavailable,
+    search_places,
+    search_places_async,
+)
+from core.services.deadline import Deadline, DeadlineExceeded
+from core.services.openrouter_ai import OpenRouterError, parse_user_prompt, parse_user_prompt_async
+from core.services.text import fingerprint, normalize_text
+
+logger = logging.getLogger(__name__)
+
+_places_executor = ThreadPoolExecutor(max_workers=settings.PLACES_MAX_WORKERS, thread_name_prefix='places')
 
 
 class PlanGenerationError(Exception):
@@ -20,49 +42,687 @@ def validate_parsed_json(data: dict) -> dict:
     return data
 
 
-def _window_queries(window: dict, city: str) -> list[str]:
+# Place types Google Text Search answers well in one combined query ("bar o brewery").
+PLACE_TYPE_FAMILIES = [
+    {'bar', 'brewery', 'cocktail bar', 'night_club', 'live music', 'salsa bar', 'karaoke', 'pub', 'discoteca'},
+    {'restaurant', 'pizza', 'burger', 'sushi', 'food', 'comida'},
+    {'cafe', 'ice_cream', 'dessert', 'bakery', 'breakfast', 'brunch', 'heladeria', 'panaderia'},
+    {'museum', 'art_gallery', 'theater', 'movie_theater', 'museo'},
+    {'park', 'mirador', 'parque'},
+]
+MAX_TYPES_PER_QUERY = 3
+# A window stops waiting on its queries once it has this many distinct places that clear both bars.
+GOOD_PLACE_MIN_RATING = 4.2
+GOOD_PLACE_MIN_REVIEWS = 30
+
+
+def _family(place_type: str) -> int | None:
+    normalized = place_type.strip().lower()
+    for idx, family in enumerate(PLACE_TYPE_FAMILIES):
+        if normalized in family:
+            return idx
+    return None
+
+
+def _merged_place_types(place_types: list[str]) -> list[list[str]]:
+    groups: list[list[str]] = []
+    family_groups: dict[int, list[str]] = {}
+    for place_type in place_types:
+        family = _family(place_type)
+        group = family_groups.get(family) if family is not None else None
+        if group is not None and len(group) < MAX_TYPES_PER_QUERY:
+            group.append(place_type)
+            continue
+        group = [place_type]
+        groups.append(group)
+        if family is not None:
+            family_groups[family] = group
+    return groups
+
+
+def _window_searches(window: dict, city: str, max_queries: int = 3) -> list[tuple[str, list[str]]]:
+    # Each search is a Text Search query plus the place types it stands for.
     vibes = window.get('vibes', [])
-    place_types = window.get('place_types', [])
-    combos = []
-    for place_type in place_types[:3]:
+    place_types = list(OrderedDict.fromkeys(window.get('place_types', [])[:3]))
+    searches = OrderedDict()
+    for group in _merged_place_types(place_types)[:max_queries]:
         vibe = vibes[0] if vibes else 'plan recomendado'
-        combos.append(f'{place_type} {vibe} {city}'.strip())
-    if not combos:
-        combos.append(f"{window.get('label', 'plan')} {city}".strip())
-    return list(OrderedDict.fromkeys(combos))
+        searches.setdefault(f"{' o '.join(group)} {vibe} {city}".strip(), group)
+    if not searches:
+        searches[f"{window.get('label', 'plan')} {city}".strip()] = []
+    return list(searches.items())
 
 
-def generate_plan_from_prompt(
+def _search(
+    query: str,
+    place_types: list[str],
+    city: str,
+    limit: int,
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline,
+) -> list[dict]:
+    # Ask for the whole page so every result seen lands in the local catalog.
+    places = search_places(query=query, city=city, limit=None, lat=lat, lng=lng, deadline=deadline)
+    place_catalog.record_results(places, place_types, city)
+    # Windows keep places_per_window + 1 places, and a lone merged query has to be able to fill one.
+    return places[:limit + 1]
+
+
+def _pooled_search(*args) -> list[dict]:
+    # Pool threads are not managed by Django, so each task releases the connection it opened
+    # for the Places cache and catalog instead of leaving one open per pool thread.
+    close_old_connections()
+    try:
+        return _search(*args)
+    finally:
+        close_old_connections()
+
+
+async def _search_async(
+    query: str,
+    place_types: list[str],
+    city: str,
+    limit: int,
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline,
+) -> list[dict]:
+    places = await search_places_async(query=query, city=city, limit=None, lat=lat, lng=lng, deadline=deadline)
+    await sync_to_async(place_catalog.record_results)(places, place_types, city)
+    return places[:limit + 1]
+
+
+def _catalog_places(window: dict, city: str, limit: int, lat: float | None, lng: float | None) -> list[dict]:
+    return place_catalog.find_places(
+        window.get('place_types', []), city, lat, lng, limit + 1, min_rating=GOOD_PLACE_MIN_RATING
+    )
+
+
+def _has_enough_places(query_results: list[list[dict] | None], places_per_window: int) -> bool:
+    good_ids = set()
+    for results in query_results:
+        for place in results or []:
+            rating = place.get('rating') or 0
+            reviews = place.get('user_ratings_total') or 0
+            if place.get('place_id') and rating >= GOOD_PLACE_MIN_RATING and reviews >= GOOD_PLACE_MIN_REVIEWS:
+                good_ids.add(place['place_id'])
+    return len(good_ids) >= places_per_window + 1
+
+
+def _max_queries(deadline: Deadline) -> int:
+    # With little time left, one query per window still fills every window.
+    return 3 if deadline.allows(settings.PLAN_PLACES_RESERVE_SECONDS) else 1
+
+
+def _places_timeout(deadline: Deadline) -> float:
+    return min(settings.PLACES_TOTAL_TIMEOUT, deadline.remaining())
+
+
+def _query_key(query: str) -> str:
+    return normalize_text(query)
+
+
+def _ordered_window_searches(
+    windows: list[dict],
+    city: str,
+    deadline: Deadline,
+    speculative: dict,
+) -> list[list[tuple[str, list[str]]]]:
+    # Queries already running speculatively go first: they are the cheapest to wait on.
+    max_queries = _max_queries(deadline)
+    return [
+        sorted(_window_searches(window, city, max_queries), key=lambda search: _query_key(search[0]) not in speculative)
+        for window in windows
+    ]
+
+
+def _drop_unused_speculation(speculative: dict, queries: list[list[tuple[str, list[str]]]]) -> None:
+    # Speculative guesses the parse did not confirm: cancel them if they have not started.
+    wanted = {_query_key(query) for window_searches in queries for query, _ in window_searches}
+    for key in [key for key in speculative if key not in wanted]:
+        speculative.pop(key).cancel()
+
+
+def _query_places(future) -> list[dict]:
+    try:
+        return future.result()
+    except (DeadlineExceeded, CancelledError, asyncio.CancelledError):
+        return []
+    except GooglePlacesUnavailable:
+        # One slow or failing query only thins out its window; the plan is still returned.
+        logger.warning('Places query failed; continuing without its results', exc_info=True)
+        return []
+    except GooglePlacesAPIError as exc:
+        raise PlanGenerationError(str(exc)) from exc
+
+
+class _WindowFanout:
+    # Bookkeeping shared by the thread and asyncio fan-outs. Every window starts from the
+    # local catalog and, if that is not enough, sends its merged queries one at a time: the
+    # next one goes out as soon as the previous comes back short, or after
+    # PLACES_QUERY_STAGGER_MS if it is still in flight. A window that fills early is settled
+    # without paying for its remaining queries. Results sit in query order after the catalog
+    # seed, whatever order the calls finish in.
+    def __init__(self, windows, city, limit, deadline, speculative, catalog_results, submit):
+        self.limit = limit
+        self.submit = submit
+        self.stagger = settings.PLACES_QUERY_STAGGER_MS / 1000
+        self.speculative = dict(speculative or {})
+        self.queries = _ordered_window_searches(windows, city, deadline, self.speculative)
+        self.results: list[list[list[dict] | None]] = [
+            [places, *[None] * len(searches)] for places, searches in zip(catalog_results, self.queries)
+        ]
+        self.issued = [0] * len(windows)
+        self.next_at: list[float | None] = [None] * len(windows)
+        self.waiting: dict = {}
+        self.by_query: dict = {}
+        self.settled: set[int] = set()
+        _drop_unused_speculation(self.speculative, self.queries)
+
+    def _running(self, key: str) -> bool:
+        future = self.by_query.get(key)
+        return key in self.speculative or (future is not None and not future.cancelled())
+
+    def _issue_next(self, window_idx: int) -> None:
+        query_idx = self.issued[window_idx]
+        query, place_types = self.queries[window_idx][query_idx]
+        key = _query_key(query)
+        future = self.by_query.get(key)
+        if future is None or future.cancelled():
+            future = self.speculative.pop(key, None) or self.submit(query, place_types)
+        self.by_query[key] = future
+        self.waiting.setdefault(future, []).append((window_idx, query_idx))
+        self.issued[window_idx] += 1
+        has_more = self.issued[window_idx] < len(self.queries[window_idx])
+        self.next_at[window_idx] = time.monotonic() + self.stagger if has_more else None
+
+    def _issue(self, window_idx: int) -> None:
+        self._issue_next(window_idx)
+        # Queries already in flight for speculation or another window cost nothing extra to wait on.
+        while self.next_at[window_idx] is not None and self._running(
+            _query_key(self.queries[window_idx][self.issued[window_idx]][0])
+        ):
+            self._issue_next(window_idx)
+
+    def _pending(self, window_idx: int) -> bool:
+        return any(idx == window_idx for slots in self.waiting.values() for idx, _ in slots)
+
+    def _result(self, window_idx: int) -> tuple[int, list[list[dict]], int]:
+        return window_idx, [places for places in self.results[window_idx] if places is not None], self.issued[window_idx]
+
+    def _settle(self, window_idx: int) -> tuple[int, list[list[dict]], int]:
+        self.settled.add(window_idx)
+        self.next_at[window_idx] = None
+        for future, slots in list(self.waiting.items()):
+            slots[:] = [slot for slot in slots if slot[0] != window_idx]
+            if not slots:
+                del self.waiting[future]
+                future.cancel()
+        return self._result(window_idx)
+
+    def start(self) -> list[tuple[int, list[list[dict]], int]]:
+        ready = []
+        for window_idx in range(len(self.results)):
+            if _has_enough_places(self.results[window_idx], self.limit):
+                ready.append(self._settle(window_idx))
+            else:
+                self._issue(window_idx)
+        return ready
+
+    def issue_due(self) -> None:
+        now = time.monotonic()
+        for window_idx, due in enumerate(self.next_at):
+            if due is not None and due <= now:
+                self._issue(window_idx)
+
+    def timeout(self, stop_at: float) -> float:
+        due = [at for at in self.next_at if at is not None]
+        return max(0, min([stop_at, *due]) - time.monotonic())
+
+    def complete(self, future, places: list[dict]) -> list[tuple[int, list[list[dict]], int]]:
+        ready = []
+        for window_idx, query_idx in self.waiting.pop(future, []):
+            self.results[window_idx][query_idx + 1] = places
+            if _has_enough_places(self.results[window_idx], self.limit):
+                ready.append(self._settle(window_idx))
+            elif self.next_at[window_idx] is not None:
+                # Came back short: no point waiting out the stagger for the next query.
+                self._issue(window_idx)
+            elif not self._pending(window_idx):
+                ready.append(self._settle(window_idx))
+        return ready
+
+    def unsettled(self) -> list[tuple[int, list[list[dict]], int]]:
+        return [self._result(window_idx) for window_idx in range(len(self.results)) if window_idx not in self.settled]
+
+    def cancel(self) -> None:
+        for future in [*self.by_query.values(), *self.speculative.values()]:
+            future.cancel()
+
+
+def _iter_window_results(
+    windows: list[dict],
+    city: str,
+    limit: int,
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline,
+    speculative: dict[str, Future] | None = None,
+) -> Iterator[tuple[int, list[list[dict]], int]]:
+    # Each window is yielded as soon as it is settled, with the number of Places calls it
+    # made; anything still pending at the deadline is built from what did finish.
+    fanout = _WindowFanout(
+        windows,
+        city,
+        limit,
+        deadline,
+        speculative,
+        [_catalog_places(window, city, limit, lat, lng) for window in windows],
+        lambda query, place_types: _places_executor.submit(_pooled_search, query, place_types, city, limit, lat, lng, deadline),
+    )
+    try:
+        yield from fanout.start()
+        stop_at = time.monotonic() + _places_timeout(deadline)
+        while fanout.waiting and time.monotonic() < stop_at:
+            done, _ = futures_wait(list(fanout.waiting), timeout=fanout.timeout(stop_at), return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from fanout.complete(future, _query_places(future))
+            fanout.issue_due()
+        yield from fanout.unsettled()
+    finally:
+        fanout.cancel()
+
+
+async def _aiter_window_results(
+    windows: list[dict],
+    city: str,
+    limit: int,
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline,
+    speculative: dict[str, asyncio.Task] | None = None,
+) -> AsyncIterator[tuple[int, list[list[dict]], int]]:
+    fanout = _WindowFanout(
+        windows,
+        city,
+        limit,
+        deadline,
+        speculative,
+        [await sync_to_async(_catalog_places)(window, city, limit, lat, lng) for window in windows],
+        lambda query, place_types: asyncio.ensure_future(_search_async(query, place_types, city, limit, lat, lng, deadline)),
+    )
+    try:
+        for settled in fanout.start():
+            yield settled
+        stop_at = time.monotonic() + _places_timeout(deadline)
+        while fanout.waiting and time.monotonic() < stop_at:
+            done, _ = await asyncio.wait(list(fanout.waiting), timeout=fanout.timeout(stop_at), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for settled in fanout.complete(task, _query_places(task)):
+                    yield settled
+            fanout.issue_due()
+        for settled in fanout.unsettled():
+            yield settled
+    finally:
+        fanout.cancel()
+
+
+def _merge_window_places(
+    window: dict,
+    query_results: list[list[dict]],
+    places_per_window: int,
+    queries_issued: int,
+) -> dict:
+    all_places = []
+    seen_ids = set()
+    for results in query_results:
+        for place in results:
+            place_id = place.get('place_id')
+            if not place_id or place_id in seen_ids:
+                continue
+            seen_ids.add(place_id)
+            all_places.append(place)
+    return {**window, 'places': all_places[:places_per_window + 1], 'places_queries': queries_issued}
+
+
+def _local_parse(prompt: str, city_name: str, user_preferences: dict | None) -> tuple[dict, float] | None:
+    if not settings.LOCAL_PARSER_ENABLED:
+        return None
+    parsed, confidence = local_parser.parse_prompt(prompt, city_name, user_preferences)
+    if confidence < settings.LOCAL_PARSER_MIN_CONFIDENCE:
+        logger.info('Local parser not confident enough (%.2f); falling back to OpenRouter', confidence)
+    else:
+        logger.info('Local parser handled prompt (confidence %.2f)', confidence)
+    return parsed, confidence
+
+
+def _confident_local_parse(local: tuple[dict, float] | None) -> dict | None:
+    if local is None or local[1] < settings.LOCAL_PARSER_MIN_CONFIDENCE:
+        return None
+    return validate_parsed_json(local[0])
+
+
+def _degraded_parse(local: tuple[dict, float] | None, exc: OpenRouterError) -> dict:
+    # Out of time or out of luck with the LLM: a rough local parse still yields a valid plan.
+    if local is None or not local[0]['time_windows']:
+        raise PlanGenerationError(str(exc)) from exc
+    logger.warning('OpenRouter parse failed (%s); using the local parse (confidence %.2f)', exc, local[1])
+    return validate_parsed_json(local[0])
+
+
+def _llm_deadline(deadline: Deadline) -> Deadline:
+    return deadline.reserve(settings.PLAN_PLACES_RESERVE_SECONDS)
+
+
+def _quick_parse(
+    prompt: str,
+    city_name: str,
+    user_preferences: dict | None,
+) -> tuple[dict | None, tuple[dict, float] | None]:
+    cached = prompt_cache.get_cached_parse(prompt, city_name, user_preferences)
+    if cached is not None:
+        return validate_parsed_json(cached), None
+    local = _local_parse(prompt, city_name, user_preferences)
+    return _confident_local_parse(local), local
+
+
+def _llm_parse(
+    prompt: str,
+    city_name: str,
+    lat: float | None,
+    lng: float | None,
+    user_preferences: dict | None,
+    local: tuple[dict, float] | None,
+    deadline: Deadline,
+) -> dict:
+    try:
+        parsed = validate_parsed_json(
+            parse_user_prompt(
+                prompt,
+                city_name=city_name,
+                lat=lat,
+                lng=lng,
+                user_preferences=user_preferences,
+                deadline=_llm_deadline(deadline),
+            )
+        )
+    except OpenRouterError as exc:
+        return _degraded_parse(local, exc)
+    prompt_cache.store_parse(prompt, parsed, city_name, user_preferences)
+    return parsed
+
+
+async def _llm_parse_async(
+    prompt: str,
+    city_name: str,
+    lat: float | None,
+    lng: float | None,
+    user_preferences: dict | None,
+    local: tuple[dict, float] | None,
+    deadline: Deadline,
+) -> dict:
+    try:
+        parsed = validate_parsed_json(
+            await parse_user_prompt_async(
+                prompt,
+                city_name=city_name,
+                lat=lat,
+                lng=lng,
+                user_preferences=user_preferences,
+                deadline=_llm_deadline(deadline),
+            )
+        )
+    except OpenRouterError as exc:
+        return _degraded_parse(local, exc)
+    await sync_to_async(prompt_cache.store_parse)(prompt, parsed, city_name, user_preferences)
+    return parsed
+
+
+def _speculative_searches(
+    local: tuple[dict, float] | None,
+    city: str,
+    user_preferences: dict | None,
+) -> list[tuple[str, list[str]]]:
+    # Guess the Places queries the LLM will ask for from the rough local parse and
+    # the user's profile, so they can run while the LLM is still answering.
+    if settings.PLACES_SPECULATIVE_QUERIES <= 0:
+        return []
+    preferences = user_preferences or {}
+    preferred_vibes = list(preferences.get('preferred_vibes') or [])
+    liked = list(preferences.get('likes') or [])
+    guesses = [
+        {'vibes': window.get('vibes') or preferred_vibes, 'place_types': window.get('place_types') or liked}
+        for window in (local[0]['time_windows'] if local else [])
+    ]
+    if not guesses:
+        guesses = [{'vibes': preferred_vibes, 'place_types': liked}]
+    searches = OrderedDict()
+    for guess in guesses:
+        if guess['place_types']:
+            for query, place_types in _window_searches(guess, city):
+                searches.setdefault(query, place_types)
+    return list(searches.items())[: settings.PLACES_SPECULATIVE_QUERIES]
+
+
+def _speculative_city(local: tuple[dict, float] | None, city_name: str) -> str:
+    return city_name or (local[0]['city'] if local else '')
+
+
+def _start_speculation(
+    local: tuple[dict, float] | None,
+    city_name: str,
+    user_preferences: dict | None,
+    limit: int,
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline,
+) -> dict[str, Future]:
+    city = _speculative_city(local, city_name)
+    return {
+        _query_key(query): _places_executor.submit(_pooled_search, query, place_types, city, limit, lat, lng, deadline)
+        for query, place_types in _speculative_searches(local, city, user_preferences)
+    }
+
+
+def _start_speculation_async(
+    local: tuple[dict, float] | None,
+    city_name: str,
+    user_preferences: dict | None,
+    limit: int,
+    lat: float | None,
+    lng: float | None,
+    deadline: Deadline,
+) -> dict[str, asyncio.Task]:
+    city = _speculative_city(local, city_name)
+    return {
+        _query_key(query): asyncio.ensure_future(_search_async(query, place_types, city, limit, lat, lng, deadline))
+        for query, place_types in _speculative_searches(local, city, user_preferences)
+    }
+
+
+def iter_plan_events(
     prompt: str,
     places_per_window: int = 3,
     city_name: str = '',
     lat: float | None = None,
     lng: float | None = None,
     user_preferences: dict | None = None,
-) -> dict:
-    try:
-        parsed = validate_parsed_json(parse_user_prompt(prompt, city_name=city_name, lat=lat, lng=lng, user_preferences=user_preferences))
-    except OpenRouterError as exc:
-        raise PlanGenerationError(str(exc)) from exc
+    deadline: Deadline | None = None,
+) -> Iterator[dict]:
+    deadline = deadline or Deadline.for_plan()
+    parsed, local = _quick_parse(prompt, city_name, user_preferences)
+    speculative = {}
+    if parsed is None:
+        speculative = _start_speculation(local, city_name, user_preferences, places_per_window, lat, lng, deadline)
+        try:
+            parsed = _llm_parse(prompt, city_name, lat, lng, user_preferences, local, deadline)
+        except PlanGenerationError:
+            for future in speculative.values():
+                future.cancel()
+            raise
+
+    city = city_name or parsed.get('city', '')
+    if city_name:
+        parsed['city'] = city_name
+    yield {'type': 'parsed', 'prompt': prompt, 'parsed_request': parsed}
+
+    windows = parsed['time_windows']
+    for window_idx, query_results, queries_issued in _iter_window_results(
+        windows, city, places_per_window, lat, lng, deadline, speculative
+    ):
+        window = _merge_window_places(windows[window_idx], query_results, places_per_window, queries_issued)
+        yield {'type': 'window', 'index': window_idx, 'window': window}
 
-    enriched_windows = []
-    for window in parsed['time_windows']:
-        city = city_name or parsed.get('city', '')
-        all_places = []
-        seen_ids = set()
-        for query in _window_queries(window, city):
-            try:
-                results = search_places(query=query, city=city, limit=places_per_window, lat=lat, lng=lng)
-            except GooglePlacesAPIError as exc:
-                raise PlanGenerationError(str(exc)) from exc
-            for place in results:
-                place_id = place.get('place_id')
-                if not place_id or place_id in seen_ids:
-                    continue
-                seen_ids.add(place_id)
-                all_places.append(place)
-        enriched_windows.append({**window, 'places': all_places[:places_per_window + 1]})
 
+async def aiter_plan_events(
+    prompt: str,
+    places_per_window: int = 3,
+    city_name: str = '',
+    lat: float | None = None,
+    lng: float | None = None,
+    user_preferences: dict | None = None,
+    deadline: Deadline | None = None,
+) -> AsyncIterator[dict]:
+    deadline = deadline or Deadline.for_plan()
+    parsed, local = await sync_to_async(_quick_parse)(prompt, city_name, user_preferences)
+    speculative = {}
+    if parsed is None:
+        speculative = _start_speculation_async(local, city_name, user_preferences, places_per_window, lat, lng, deadline)
+        try:
+            parsed = await _llm_parse_async(prompt, city_name, lat, lng, user_preferences, local, deadline)
+        except PlanGenerationError:
+            for task in speculative.values():
+                task.cancel()
+            raise
+
+    city = city_name or parsed.get('city', '')
     if city_name:
         parsed['city'] = city_name
-    return {'prompt': prompt, 'parsed_request': parsed, 'time_windows': enriched_windows}
+    yield {'type': 'parsed', 'prompt': prompt, 'parsed_request': parsed}
+
+    windows = parsed['time_windows']
+    async for window_idx, query_results, queries_issued in _aiter_window_results(
+        windows, city, places_per_window, lat, lng, deadline, speculative
+    ):
+        window = _merge_window_places(windows[window_idx], query_results, places_per_window, queries_issued)
+        yield {'type': 'window', 'index': window_idx, 'window': window}
+
+
+def _collect_plan(prompt: str, parsed: dict, enriched_windows: dict[int, dict]) -> dict:
+    return {
+        'prompt': prompt,
+        'parsed_request': parsed,
+        'time_windows': [enriched_windows[idx] for idx in sorted(enriched_windows)],
+    }
+
+
+def _coalesce_key(
+    prompt: str,
+    places_per_window: int,
+    city_name: str,
+    lat: float | None,
+    lng: float | None,
+    user_preferences: dict | None,
+) -> str:
+    # Identical prompts from the same area and preferences share a single generation.
+    cell = geohash.encode(lat, lng, settings.GEOCODE_CACHE_PRECISION) if lat is not None and lng is not None else ''
+    return fingerprint(
+        [normalize_text(prompt), normalize_text(city_name), cell, user_preferences or {}, places_per_window]
+    )
+
+
+def _generate_plan(
+    prompt: str,
+    places_per_window: int = 3,
+    city_name: str = '',
+    lat: float | None = None,
+    lng: float | None = None,
+    user_preferences: dict | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    parsed = {}
+    enriched_windows = {}
+    events = iter_plan_events(
+        prompt,
+        places_per_window=places_per_window,
+        city_name=city_name,
+        lat=lat,
+        lng=lng,
+        user_preferences=user_preferences,
+        deadline=deadline,
+    )
+    for event in events:
+        if event['type'] == 'parsed':
+            parsed = event['parsed_request']
+        else:
+            enriched_windows[event['index']] = event['window']
+    return _collect_plan(prompt, parsed, enriched_windows)
+
+
+async def _generate_plan_async(
+    prompt: str,
+    places_per_window: int = 3,
+    city_name: str = '',
+    lat: float | None = None,
+    lng: float | None = None,
+    user_preferences: dict | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    parsed = {}
+    enriched_windows = {}
+    events = aiter_plan_events(
+        prompt,
+        places_per_window=places_per_window,
+        city_name=city_name,
+        lat=lat,
+        lng=lng,
+        user_preferences=user_preferences,
+        deadline=deadline,
+    )
+    async for event in events:
+        if event['type'] == 'parsed':
+            parsed = event['parsed_request']
+        else:
+            enriched_windows[event['index']] = event['window']
+    return _collect_plan(prompt, parsed, enriched_windows)
+
+
+def generate_plan_from_prompt(
+    prompt: str,
+    places_per_window: int = 3,
+    city_name: str = '',
+    lat: float | None = None,
+    lng: float | None = None,
+    user_preferences: dict | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    deadline = deadline or Deadline.for_plan()
+    key = _coalesce_key(prompt, places_per_window, city_name, lat, lng, user_preferences)
+    plan = singleflight.do(
+        key,
+        lambda: _generate_plan(prompt, places_per_window, city_name, lat, lng, user_preferences, deadline),
+        wait=deadline.remaining(),
+    )
+    plan['prompt'] = prompt
+    return plan
+
+
+async def generate_plan_from_prompt_async(
+    prompt: str,
+    places_per_window: int = 3,
+    city_name: str = '',
+    lat: float | None = None,
+    lng: float | None = None,
+    user_preferences: dict | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    deadline = deadline or Deadline.for_plan()
+    key = _coalesce_key(prompt, places_per_window, city_name, lat, lng, user_preferences)
+    plan = await singleflight.do_async(
+        key,
+        lambda: _generate_plan_async(prompt, places_per_window, city_name, lat, lng, user_preferences, deadline),
+        wait=deadline.remaining(),
+    )
+    plan['prompt'] = prompt
+    return plan
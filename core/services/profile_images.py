@@ -0,0 +1,111 @@
+import io
+import os
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+ORIGINAL_MAX_SIDE = 2048
+# Avatars are cropped square; covers keep their aspect ratio and are capped by width.
+VARIANTS = {
+    'avatar': {'sm': (96, 96), 'md': (192, 192)},
+    'cover': {'md': (960, None), 'lg': (1600, None)},
+}
+FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 4}), 'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True})}
+
+
+def _open(file) -> Image.Image:
+    # Image.open only parses the header, so size checks run before any pixel data is decoded.
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        try:
+            image = Image.open(file)
+        except (UnidentifiedImageError, Image.DecompressionBombError, Image.DecompressionBombWarning, OSError) as exc:
+            raise ValidationError('El archivo no es una imagen válida.') from exc
+    if image.format not in ALLOWED_FORMATS:
+        raise ValidationError('Usa una imagen JPG, PNG, WebP o GIF.')
+    if image.width * image.height > settings.PROFILE_IMAGE_MAX_PIXELS:
+        raise ValidationError('La imagen tiene demasiados píxeles.')
+    return image
+
+
+def check_upload(upload) -> None:
+    if upload.size > settings.PROFILE_IMAGE_MAX_BYTES:
+        raise ValidationError(f'La imagen no puede pesar más de {settings.PROFILE_IMAGE_MAX_BYTES // (1024 * 1024)} MB.')
+    upload.seek(0)
+    _open(upload)
+    upload.seek(0)
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    name, options = FORMATS[image_format]
+    output = io.BytesIO()
+    # Re-encoding without an exif argument drops EXIF, GPS included.
+    image.save(output, name, **options)
+    return output.getvalue()
+
+
+def _resized(image: Image.Image, box: tuple[int, int | None]) -> Image.Image:
+    width, height = box
+    if height is not None:
+        return ImageOps.fit(image, (width, height), Image.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, width * 4), Image.LANCZOS)
+    return resized
+
+
+def _delete_variants(profile, field_name: str, storage) -> None:
+    for formats in (profile.image_variants or {}).get(field_name, {}).values():
+        for name in formats.values():
+            storage.delete(name)
+
+
+def process(profile, field_name: str) -> None:
+    file = getattr(profile, field_name)
+    storage = file.storage
+    _delete_variants(profile, field_name, storage)
+    variants = dict(profile.image_variants or {})
+    variants.pop(field_name, None)
+    if not file:
+        profile.image_variants = variants
+        profile.save(update_fields=['image_variants'])
+        return
+
+    with file.open('rb'):
+        image = _flatten(_open(file))
+    image.thumbnail((ORIGINAL_MAX_SIDE, ORIGINAL_MAX_SIDE), Image.LANCZOS)
+
+    old_name = file.name
+    stem = os.path.splitext(os.path.basename(old_name))[0]
+    file.save(f'{stem}.jpg', ContentFile(_encode(image, 'jpeg')), save=False)
+    if file.name != old_name:
+        storage.delete(old_name)
+
+    variants[field_name] = {}
+    for variant, box in VARIANTS[field_name].items():
+        resized = _resized(image, box)
+        variants[field_name][variant] = {
+            image_format: storage.save(
+                f'{field_name}s/variants/{stem}-{variant}.{image_format}', ContentFile(_encode(resized, image_format))
+            )
+            for image_format in FORMATS
+        }
+    profile.image_variants = variants
+    profile.save(update_fields=[field_name, 'image_variants'])
+
+
+def variant_name(profile, field_name: str, variant: str, image_format: str) -> str:
+    return (profile.image_variants or {}).get(field_name, {}).get(variant, {}).get(image_format, '')
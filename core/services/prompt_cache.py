@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import ParsedPromptCache
+from core.services import local_parser, minhash
+from core.services.text import fingerprint, normalize_text, parse_amount
+
+logger = logging.getLogger(__name__)
+
+# Articles and fillers that never change what a prompt asks for. Negations ("sin", "no") stay on purpose.
+_STOPWORDS = {'a', 'al', 'de', 'del', 'el', 'la', 'las', 'lo', 'los', 'un', 'una', 'unos', 'unas', 'y', 'e', 'que', 'me', 'quiero', 'porfa', 'por', 'favor'}
+_NUMBER_RE = re.compile(r'(\d[\d.,]*)\s*(millones|millon|mil|k)?\b')
+_MULTIPLIERS = {'k': 1_000, 'mil': 1_000, 'millon': 1_000_000, 'millones': 1_000_000}
+MAX_INDEXED_SCOPES = 256
+
+
+class _ScopeIndex:
+    def __init__(self):
+        self.last_id = 0
+        self.entries: dict[str, tuple[list[int], str, str]] = {}
+        self.buckets: dict[tuple[int, tuple[int, ...]], set[str]] = {}
+
+    def add(self, cache_key: str, signature: list[int], numbers: str, terms: str) -> None:
+        self.entries[cache_key] = (signature, numbers, terms)
+        for band in minhash.band_keys(signature):
+            self.buckets.setdefault(band, set()).add(cache_key)
+
+    def discard(self, cache_key: str) -> None:
+        entry = self.entries.pop(cache_key, None)
+        if entry is None:
+            return
+        for band in minhash.band_keys(entry[0]):
+            self.buckets.get(band, set()).discard(cache_key)
+
+    def candidates(self, signature: list[int]) -> set[str]:
+        found = set()
+        for band in minhash.band_keys(signature):
+            found.update(self.buckets.get(band, ()))
+        return found
+
+
+_index_lock = threading.Lock()
+_indexes: OrderedDict[str, _ScopeIndex] = OrderedDict()
+
+
+def _tokens(prompt: str) -> list[str]:
+    return [token for token in normalize_text(prompt).split() if token not in _STOPWORDS and not token.isdigit()]
+
+
+def _numbers(prompt: str) -> str:
+    # Budgets and group sizes must match exactly: "100 mil" and "200 mil" are different plans.
+    values = []
+    for digits, unit in _NUMBER_RE.findall(prompt.lower().replace('millón', 'millon')):
+        values.append(int(parse_amount(digits) * _MULTIPLIERS.get(unit, 1)))
+    return ','.join(str(value) for value in sorted(values))
+
+
+def _terms(prompt: str) -> str:
+    # Place types, periods, moods, budget and negations must match exactly for a near-duplicate hit:
+    # "cafe" vs "cerveza" or "sin gastar mucho" vs "gastando mucho" look alike to MinHash but are different plans.
+    return ' '.join(local_parser.lexicon_terms(prompt))
+
+
+def _scope(city_name: str, user_preferences: dict | None) -> str:
+    return fingerprint([normalize_text(city_name), user_preferences or {}])
+
+
+def _cache_key(scope: str, tokens: list[str], numbers: str, terms: str) -> str:
+    # Terms carry which place goes to which period, which sorting the tokens throws away.
+    raw_key = '|'.join([scope, ' '.join(sorted(tokens)), numbers, terms])
+    return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+
+def _synced_index(scope: str, now) -> _ScopeIndex:
+    with _index_lock:
+        index = _indexes.get(scope)
+        if index is None:
+            index = _indexes[scope] = _ScopeIndex()
+        _indexes.move_to_end(scope)
+        while len(_indexes) > MAX_INDEXED_SCOPES:
+            _indexes.popitem(last=False)
+        last_id = index.last_id
+
+    # Pick up entries stored by other workers since the last lookup in this scope.
+    rows = list(
+        ParsedPromptCache.objects.filter(scope=scope, id__gt=last_id, expires_at__gt=now)
+        .order_by('id')
+        .values_list('id', 'cache_key', 'signature', 'numbers', 'terms')
+    )
+    with _index_lock:
+        for row_id, cache_key, signature, numbers, terms in rows:
+            if row_id > index.last_id:
+                index.add(cache_key, signature, numbers, terms)
+                index.last_id = row_id
+    return index
+
+
+def _load(cache_key: str, now) -> dict[str, Any] | None:
+    parsed = (
+        ParsedPromptCache.objects.filter(cache_key=cache_key, expires_at__gt=now)
+        .values_list('parsed', flat=True)
+        .first()
+    )
+    if parsed is not None:
+        ParsedPromptCache.objects.filter(cache_key=cache_key).update(hits=F('hits') + 1, last_used_at=now)
+    return parsed
+
+
+def _nearest(index: _ScopeIndex, signature: list[int], numbers: str, terms: str) -> str | None:
+    best_key, best_score = None, settings.PROMPT_CACHE_SIMILARITY
+    for cache_key in index.candidates(signature):
+        candidate_signature, candidate_numbers, candidate_terms = index.entries[cache_key]
+        if candidate_numbers != numbers or candidate_terms != terms:
+            continue
+        score = minhash.similarity(signature, candidate_signature)
+        if score >= best_score:
+            best_key, best_score = cache_key, score
+    return best_key
+
+
+def get_cached_parse(prompt: str, city_name: str = '', user_preferences: dict | None = None) -> dict[str, Any] | None:
+    if not settings.PROMPT_CACHE_ENABLED:
+        return None
+    now = timezone.now()
+    scope = _scope(city_name, user_preferences)
+    tokens = _tokens(prompt)
+    numbers = _numbers(prompt)
+    terms = _terms(prompt)
+    try:
+        parsed = _load(_cache_key(scope, tokens, numbers, terms), now)
+        if parsed is not None:
+            logger.info('Prompt cache exact hit')
+            return parsed
+
+        signature = minhash.signature(minhash.shingles(tokens))
+        index = _synced_index(scope, now)
+        with _index_lock:
+            near_key = _nearest(index, signature, numbers, terms)
+        if near_key is None:
+            return None
+        parsed = _load(near_key, now)
+        if parsed is None:
+            with _index_lock:
+                index.discard(near_key)
+            return None
+    except DatabaseError:
+        logger.warning('Prompt cache lookup failed', exc_info=True)
+        return None
+    logger.info('Prompt cache near-duplicate hit')
+    return parsed
+
+
+def store_parse(prompt: str, parsed: dict[str, Any], city_name: str = '', user_preferences: dict | None = None) -> None:
+    if not settings.PROMPT_CACHE_ENABLED:
+        return
+    now = timezone.now()
+    scope = _scope(city_name, user_preferences)
+    tokens = _tokens(prompt)
+    numbers = _numbers(prompt)
+    terms = _terms(prompt)
+    cache_key = _cache_key(scope, tokens, numbers, terms)
+    values = {
+        'scope': scope,
+        'normalized_prompt': ' '.join(tokens),
+        'numbers': numbers[:120],
+        'terms': terms[:255],
+        'signature': minhash.signature(minhash.shingles(tokens)),
+        'parsed': parsed,
+        'expires_at': now + timedelta(seconds=settings.PROMPT_CACHE_TTL),
+        'last_used_at': now,
+    }
+    try:
+        if not ParsedPromptCache.objects.filter(cache_key=cache_key).update(**values):
+            try:
+                ParsedPromptCache.objects.create(cache_key=cache_key, **values)
+            except IntegrityError:
+                pass
+            _evict()
+    except DatabaseError:
+        logger.warning('Prompt cache write failed', exc_info=True)
+
+
+def _evict() -> None:
+    ParsedPromptCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    overflow = ParsedPromptCache.objects.count() - settings.PROMPT_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = list(ParsedPromptCache.objects.order_by('last_used_at').values_list('id', flat=True)[:overflow])
+        ParsedPromptCache.objects.filter(id__in=stale_ids).delete()
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import FriendRequest, Relationship
+from core.services import friend_cache
+
+
+def _write_pair(user_id: int, other_id: int, state: str | None, friend_request: FriendRequest | None = None) -> None:
+    if state is None:
+        Relationship.objects.filter(
+            Q(user_id=user_id, other_user_id=other_id) | Q(user_id=other_id, other_user_id=user_id)
+        ).delete()
+        return
+    for row_user, row_other, row_state in ((user_id, other_id, state), (other_id, user_id, Relationship.MIRROR[state])):
+        Relationship.objects.update_or_create(
+            user_id=row_user,
+            other_user_id=row_other,
+            defaults={'state': row_state, 'request': friend_request},
+        )
+
+
+def send_request(from_user, to_user) -> FriendRequest:
+    with transaction.atomic():
+        friend_request, _ = FriendRequest.objects.update_or_create(
+            from_user=from_user,
+            to_user=to_user,
+            defaults={'state': FriendRequest.State.PENDING},
+        )
+        _write_pair(from_user.id, to_user.id, Relationship.State.PENDING_OUT, friend_request)
+    return friend_request
+
+
+def accept_request(friend_request: FriendRequest) -> None:
+    with transaction.atomic():
+        friend_request.state = FriendRequest.State.ACCEPTED
+        friend_request.save(update_fields=['state', 'updated_at'])
+        FriendRequest.objects.filter(
+            from_user=friend_request.to_user,
+            to_user=friend_request.from_user,
+            state=FriendRequest.State.PENDING,
+        ).update(state=FriendRequest.State.REJECTED, updated_at=timezone.now())
+        _write_pair(friend_request.from_user_id, friend_request.to_user_id, Relationship.State.FRIENDS, friend_request)
+
+
+def reject_request(friend_request: FriendRequest) -> None:
+    with transaction.atomic():
+        friend_request.state = FriendRequest.State.REJECTED
+        friend_request.save(update_fields=['state', 'updated_at'])
+        _write_pair(friend_request.from_user_id, friend_request.to_user_id, None)
+
+
+def are_friends(user_a, user_b) -> bool:
+    return friend_cache.are_friends(user_a, user_b)
+
+
+def friendship_states(viewer, users) -> dict:
+    # One indexed query on (user, other_user) regardless of how many users are resolved.
+    if not viewer.is_authenticated:
+        return {user.id: {'state': 'none'} for user in users}
+    user_ids = {user.id for user in users} - {viewer.id}
+    rows = {}
+    if user_ids:
+        rows = {
+            row.other_user_id: row
+            for row in Relationship.objects.filter(user=viewer, other_user_id__in=user_ids).select_related('request')
+        }
+    states = {}
+    for user in users:
+        if user.id == viewer.id:
+            states[user.id] = {'state': 'self'}
+        elif user.id in rows:
+            states[user.id] = {'state': rows[user.id].state, 'request': rows[user.id].request}
+        else:
+            states[user.id] = {'state': 'none'}
+    return states
+
+
+def friendship_state(viewer, owner) -> dict:
+    return friendship_states(viewer, [owner])[owner.id]
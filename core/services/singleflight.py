@@ -0,0 +1,153 @@
+import asyncio
+import copy
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.25
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_lock = threading.Lock()
+_calls: dict[str, _Call] = {}
+_async_calls: dict[tuple[int, str], asyncio.Future] = {}
+
+
+def _lock_key(key: str) -> str:
+    return f'singleflight:lock:{key}'
+
+
+def _result_key(key: str) -> str:
+    return f'singleflight:result:{key}'
+
+
+def _wait_seconds(wait: float | None) -> float:
+    return settings.PLAN_COALESCE_WAIT if wait is None else min(wait, settings.PLAN_COALESCE_WAIT)
+
+
+def _release(key: str, token: str) -> None:
+    # A leader that outlived the lock TTL must not delete the lock another worker took since.
+    if cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def _run_across_workers(key: str, fn: Callable[[], Any], wait: float) -> Any:
+    # Another worker may already be computing this key: wait for its stored
+    # result while it still holds the lock, otherwise compute it ourselves.
+    cached = cache.get(_result_key(key))
+    if cached is not None:
+        return cached
+
+    token = uuid.uuid4().hex
+    give_up_at = time.monotonic() + wait
+    while not cache.add(_lock_key(key), token, timeout=settings.PLAN_COALESCE_WAIT):
+        if time.monotonic() > give_up_at:
+            return fn()
+        time.sleep(POLL_INTERVAL)
+        cached = cache.get(_result_key(key))
+        if cached is not None:
+            return cached
+
+    try:
+        cached = cache.get(_result_key(key))
+        if cached is not None:
+            return cached
+        result = fn()
+        cache.set(_result_key(key), result, timeout=settings.PLAN_COALESCE_TTL)
+        return result
+    finally:
+        _release(key, token)
+
+
+def do(key: str, fn: Callable[[], Any], wait: float | None = None) -> Any:
+    if not settings.PLAN_COALESCE_ENABLED:
+        return fn()
+
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        if not call.done.wait(_wait_seconds(wait)):
+            return fn()
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    try:
+        call.result = _run_across_workers(key, fn, _wait_seconds(wait))
+        return copy.deepcopy(call.result)
+    except Exception as exc:
+        call.error = exc
+        raise
+    finally:
+        call.done.set()
+        with _lock:
+            _calls.pop(key, None)
+
+
+async def do_async(key: str, fn: Callable[[], Awaitable[Any]], wait: float | None = None) -> Any:
+    if not settings.PLAN_COALESCE_ENABLED:
+        return await fn()
+
+    loop = asyncio.get_running_loop()
+    loop_key = (id(loop), key)
+    future = _async_calls.get(loop_key)
+    if future is not None:
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), _wait_seconds(wait))
+        except asyncio.TimeoutError:
+            return await fn()
+        return copy.deepcopy(result)
+
+    future = _async_calls[loop_key] = loop.create_future()
+    try:
+        result = await sync_to_async(cache.get)(_result_key(key))
+        if result is None:
+            token = uuid.uuid4().hex
+            acquired = await sync_to_async(cache.add)(_lock_key(key), token, timeout=settings.PLAN_COALESCE_WAIT)
+            if acquired:
+                try:
+                    result = await fn()
+                    await sync_to_async(cache.set)(_result_key(key), result, timeout=settings.PLAN_COALESCE_TTL)
+                finally:
+                    await sync_to_async(_release)(key, token)
+            else:
+                result = await _wait_for_remote_result(key, fn, _wait_seconds(wait))
+        future.set_result(result)
+        return copy.deepcopy(result)
+    except Exception as exc:
+        future.set_exception(exc)
+        # Followers re-raise it; mark it retrieved so asyncio does not warn when there are none.
+        future.exception()
+        raise
+    finally:
+        _async_calls.pop(loop_key, None)
+
+
+async def _wait_for_remote_result(key: str, fn: Callable[[], Awaitable[Any]], wait: float) -> Any:
+    give_up_at = time.monotonic() + wait
+    while time.monotonic() < give_up_at:
+        await asyncio.sleep(POLL_INTERVAL)
+        result = await sync_to_async(cache.get)(_result_key(key))
+        if result is not None:
+            return result
+        if await sync_to_async(cache.get)(_lock_key(key)) is None:
+            break
+    return await fn()
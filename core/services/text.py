@@ -0,0 +1,26 @@
+import hashlib
+import json
+import re
+import unicodedata
+
+
+def normalize_text(value: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', stripped.lower()).split())
+
+
+def parse_amount(number: str) -> float:
+    # "100.000" and "1,500,000" group thousands; "1.5" and "2,5" carry a decimal part.
+    number = number.strip('.,')
+    parts = re.split(r'[.,]', number)
+    if len(parts) == 1:
+        return float(number)
+    if all(len(part) == 3 for part in parts[1:]):
+        return float(''.join(parts))
+    return float(''.join(parts[:-1]) + '.' + parts[-1])
+
+
+def fingerprint(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
@@ -1,8 +1,9 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from core.models import UserProfile
+from core.models import FriendRequest, Relationship, UserProfile
+from core.services import friend_cache
 
 
 @receiver(post_save, sender=User)
@@ -15,3 +16,13 @@ def create_user_profile(sender, instance, created, **kwargs):
         user=instance,
         defaults={'display_name': instance.username},
     )
+
+
+@receiver([post_save, post_delete], sender=Relationship)
+def invalidate_relationship_friend_sets(sender, instance, **kwargs):
+    friend_cache.invalidate(instance.user_id, instance.other_user_id)
+
+
+@receiver([post_save, post_delete], sender=FriendRequest)
+def invalidate_request_friend_sets(sender, instance, **kwargs):
+    friend_cache.invalidate(instance.from_user_id, instance.to_user_id)
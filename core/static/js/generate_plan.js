@@ -10,54 +10,156 @@
   const lngInput = document.getElementById('lng');
   const cityInput = document.getElementById('cityName');
   const shareInput = document.getElementById('isShared');
+  const generationMode = resultsRoot.dataset.generationMode || 'stream';
   let latestPayload = null;
 
-  const render = (payload) => {
-    latestPayload = payload;
-    const parsed = payload.parsed_request;
-    const cityName = payload.resolved_location?.city_name || parsed.city;
+  const renderPlace = (place) => `
+    <div class="col-12 col-md-6 col-xl-4">
+      <article class="place-card h-100">
+        <div class="place-image" style="background-image:linear-gradient(180deg, transparent, rgba(0,0,0,.5)),url('${place.photo_url || ''}')"></div>
+        <div class="p-3"><h4 class="h6">${place.name}</h4><p class="small text-soft mb-0">⭐ ${place.rating || 'N/A'} · ${place.address || ''}</p></div>
+      </article>
+    </div>`;
+
+  const renderParsed = (event) => {
+    latestPayload = {
+      prompt: event.prompt,
+      parsed_request: event.parsed_request,
+      resolved_location: event.resolved_location,
+      time_windows: event.parsed_request.time_windows.map(() => null),
+    };
+    const parsed = event.parsed_request;
+    const cityName = event.resolved_location?.city_name || parsed.city;
     document.getElementById('locationStatus').textContent = `Ubicación detectada: ${cityName} (aprox.)`;
     resultsRoot.innerHTML = `
       <div class="glass-card p-3 p-md-4 fade-up mb-3">
         <h2 class="h4 mb-1">Plan en ${cityName}</h2>
         <p class="text-soft mb-2">${parsed.mood} · ${parsed.group} · Presupuesto COP ${Number(parsed.budget_cop || 0).toLocaleString('es-CO')}</p>
-        <button class="btn app-btn app-btn-primary btn-sm js-save-plan">Guardar plan</button>
+        <button class="btn app-btn app-btn-primary btn-sm js-save-plan" disabled>Guardar plan</button>
       </div>
-      ${payload.time_windows.map((window) => `
-        <section class="result-block fade-up">
+      ${parsed.time_windows.map((window, index) => `
+        <section class="result-block fade-up" data-window-index="${index}">
           <h3 class="h5 mb-2">${window.label}</h3>
-          <div class="row g-3">
-            ${(window.places || []).map((place) => `
-              <div class="col-12 col-md-6 col-xl-4">
-                <article class="place-card h-100">
-                  <div class="place-image" style="background-image:linear-gradient(180deg, transparent, rgba(0,0,0,.5)),url('${place.photo_url || ''}')"></div>
-                  <div class="p-3"><h4 class="h6">${place.name}</h4><p class="small text-soft mb-0">⭐ ${place.rating || 'N/A'} · ${place.address || ''}</p></div>
-                </article>
-              </div>`).join('')}
-          </div>
+          <div class="row g-3 js-window-places"><div class="col-12 text-soft small">Buscando lugares…</div></div>
         </section>`).join('')}
     `;
 
-    document.querySelector('.js-save-plan').addEventListener('click', async (event) => {
+    document.querySelector('.js-save-plan').addEventListener('click', async (clickEvent) => {
       const response = await fetch('/api/save-plan/', {
         method: 'POST', credentials: 'same-origin',
         headers: { 'Content-Type': 'application/json', 'X-CSRFToken': window.getCSRFToken() },
         body: JSON.stringify({
           ...latestPayload,
           city_name: cityName,
-          country_code: payload.resolved_location?.country_code || 'CO',
+          country_code: latestPayload.resolved_location?.country_code || 'CO',
           is_shared: shareInput.checked,
           title: `Plan ${parsed.mood || ''} en ${cityName}`,
         }),
       });
       if (!response.ok) return;
       const data = await response.json();
-      event.target.textContent = 'Guardado ✓';
-      event.target.disabled = true;
+      clickEvent.target.textContent = 'Guardado ✓';
+      clickEvent.target.disabled = true;
       if (data.detail_url) window.location.href = data.detail_url;
     });
   };
 
+  const renderWindow = (event) => {
+    latestPayload.time_windows[event.index] = event.window;
+    const section = resultsRoot.querySelector(`[data-window-index="${event.index}"] .js-window-places`);
+    if (!section) return;
+    const places = event.window.places || [];
+    section.innerHTML = places.length
+      ? places.map(renderPlace).join('')
+      : '<div class="col-12 text-soft small">No encontramos lugares para esta franja.</div>';
+  };
+
+  const finish = () => {
+    latestPayload.time_windows = latestPayload.time_windows.filter(Boolean);
+    const saveBtn = document.querySelector('.js-save-plan');
+    if (saveBtn) saveBtn.disabled = false;
+  };
+
+  const handleEvent = (event) => {
+    if (event.type === 'parsed') {
+      loadingState.classList.add('d-none');
+      renderParsed(event);
+    } else if (event.type === 'window') {
+      renderWindow(event);
+    } else if (event.type === 'done') {
+      finish();
+    } else if (event.type === 'error') {
+      throw new Error(event.error || 'No se pudo generar el plan.');
+    }
+  };
+
+  const readEvents = async (response) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      lines.filter((line) => line.trim()).forEach((line) => handleEvent(JSON.parse(line)));
+      if (done) break;
+    }
+    if (buffer.trim()) handleEvent(JSON.parse(buffer));
+  };
+
+  const sleep = (ms) => new Promise((resolve) => { setTimeout(resolve, ms); });
+
+  const pollJob = async (statusUrl) => {
+    let parsedShown = false;
+    const shownWindows = new Set();
+    for (;;) {
+      const response = await fetch(statusUrl, { credentials: 'same-origin' });
+      const job = await response.json();
+      if (!response.ok) throw new Error(job.error || 'No se pudo consultar el plan.');
+      const result = job.result || {};
+      if (!parsedShown && result.parsed_request) {
+        parsedShown = true;
+        handleEvent({ type: 'parsed', prompt: result.prompt, parsed_request: result.parsed_request, resolved_location: result.resolved_location });
+      }
+      if (parsedShown && job.status !== 'done') {
+        (result.time_windows || []).forEach((window, index) => {
+          if (window && !shownWindows.has(index)) {
+            shownWindows.add(index);
+            handleEvent({ type: 'window', index, window });
+          }
+        });
+      }
+      if (job.status === 'done') {
+        latestPayload.time_windows = [];
+        (result.time_windows || []).forEach((window, index) => handleEvent({ type: 'window', index, window }));
+        handleEvent({ type: 'done' });
+        return;
+      }
+      if (job.status === 'failed') throw new Error(job.error || 'No se pudo generar el plan.');
+      await sleep(1000);
+    }
+  };
+
+  const requestPlan = async (body) => {
+    const url = generationMode === 'jobs' ? '/api/generate-plan/' : '/api/generate-plan/stream/';
+    const response = await fetch(url, {
+      method: 'POST', credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json', 'X-CSRFToken': window.getCSRFToken() },
+      body: JSON.stringify(body),
+    });
+    if (!response.ok) {
+      const payload = await response.json();
+      throw new Error(payload.error || 'No se pudo generar el plan.');
+    }
+    if (generationMode === 'jobs') {
+      const job = await response.json();
+      await pollJob(job.status_url);
+      return;
+    }
+    await readEvents(response);
+  };
+
   const submitPrompt = async () => {
     const prompt = promptInput.value.trim();
     errorNode.classList.add('d-none');
@@ -68,19 +170,12 @@
     generateBtn.disabled = true;
 
     try {
-      const response = await fetch('/api/generate-plan/', {
-        method: 'POST', credentials: 'same-origin',
-        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': window.getCSRFToken() },
-        body: JSON.stringify({
-          prompt,
-          lat: latInput.value || null,
-          lng: lngInput.value || null,
-          city_name: cityInput.value || null,
-        }),
+      await requestPlan({
+        prompt,
+        lat: latInput.value || null,
+        lng: lngInput.value || null,
+        city_name: cityInput.value || null,
       });
-      const payload = await response.json();
-      if (!response.ok) throw new Error(payload.error || 'No se pudo generar el plan.');
-      render(payload);
     } catch (error) {
       errorNode.textContent = error.message;
       errorNode.classList.remove('d-none');
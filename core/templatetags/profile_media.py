@@ -0,0 +1,34 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from core.services.profile_images import variant_name
+
+register = template.Library()
+
+
+def _variant_url(profile, field_name, variant, image_format):
+    name = variant_name(profile, field_name, variant, image_format)
+    if name:
+        return default_storage.url(name)
+    # Images uploaded before variants existed fall back to the original until they are processed.
+    file = getattr(profile, field_name, None)
+    return file.url if file else ''
+
+
+@register.simple_tag
+def profile_image_url(profile, field_name, variant, image_format='jpeg'):
+    if profile is None:
+        return ''
+    return _variant_url(profile, field_name, variant, image_format)
+
+
+@register.inclusion_tag('core/includes/avatar.html')
+def profile_avatar(profile, variant='sm', css_class='profile-avatar-sm'):
+    has_webp = bool(profile is not None and variant_name(profile, 'avatar', variant, 'webp'))
+    return {
+        'profile': profile,
+        'css_class': css_class,
+        'placeholder_class': 'avatar-placeholder small' if variant == 'sm' else 'avatar-placeholder',
+        'webp_url': _variant_url(profile, 'avatar', variant, 'webp') if has_webp else '',
+        'image_url': profile_image_url(profile, 'avatar', variant),
+    }
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import PlanJob
+from core.services import plan_jobs
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    PLAN_JOBS_MAX_RUNNING=2,
+)
+class PlanJobQueueTests(TestCase):
+    def _enqueue(self, count):
+        return [plan_jobs.enqueue({'prompt': f'plan {index}'}) for index in range(count)]
+
+    def test_claim_stops_at_the_running_cap(self):
+        self._enqueue(3)
+        claimed = [plan_jobs.claim_next('a'), plan_jobs.claim_next('b'), plan_jobs.claim_next('a')]
+        self.assertIsNone(claimed[2])
+        self.assertEqual(sorted(job.slot for job in claimed[:2]), [0, 1])
+        self.assertEqual(PlanJob.objects.filter(status=PlanJob.Status.RUNNING).count(), 2)
+
+    def test_release_requeues_without_spending_an_attempt(self):
+        self._enqueue(1)
+        job = plan_jobs.claim_next('a')
+        self.assertEqual(plan_jobs.release_jobs('a'), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker_id), (PlanJob.Status.QUEUED, 0, ''))
+        # The released attempt can no longer write progress over the requeued job.
+        with self.assertRaises(plan_jobs.JobReleased):
+            plan_jobs._save_progress(PlanJob(pk=job.pk, worker_id='a', result={}))
+
+    def test_heartbeat_keeps_a_quiet_job_from_going_stale(self):
+        self._enqueue(1)
+        job = plan_jobs.claim_next('a')
+        PlanJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        plan_jobs.heartbeat('a')
+        self.assertEqual(plan_jobs.recover_stale_jobs(), 0)
+
+    @override_settings(PLAN_JOBS_RETENTION_SECONDS=60)
+    def test_purge_only_removes_old_finished_jobs(self):
+        old, recent, queued = self._enqueue(3)
+        PlanJob.objects.filter(pk=old.pk).update(status=PlanJob.Status.DONE, finished_at=timezone.now() - timedelta(minutes=5))
+        PlanJob.objects.filter(pk=recent.pk).update(status=PlanJob.Status.FAILED, finished_at=timezone.now())
+        self.assertEqual(plan_jobs.purge_finished_jobs(), 1)
+        self.assertEqual(set(PlanJob.objects.values_list('pk', flat=True)), {recent.pk, queued.pk})
+
+    def test_anonymous_jobs_are_bound_to_their_session(self):
+        job = plan_jobs.enqueue({'prompt': 'plan'}, user=AnonymousUser(), session_key='abc')
+        self.assertTrue(plan_jobs.can_view(job, AnonymousUser(), 'abc'))
+        self.assertFalse(plan_jobs.can_view(job, AnonymousUser(), 'other'))
+        self.assertFalse(plan_jobs.can_view(job, AnonymousUser(), None))
+        self.assertFalse(plan_jobs.can_view(plan_jobs.enqueue({'prompt': 'plan'}), AnonymousUser(), ''))
+
+        self.client.get('/')
+        url = f'/api/plan-jobs/{job.pk}/'
+        self.assertEqual(self.client.get(url).status_code, 403)
+        owner = User.objects.create_user('owner', password='x')
+        owned = plan_jobs.enqueue({'prompt': 'plan'}, user=owner, session_key='abc')
+        self.assertEqual(owned.session_key, '')
+        self.client.force_login(owner)
+        self.assertEqual(self.client.get(f'/api/plan-jobs/{owned.pk}/').status_code, 200)
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import FriendRequest, Relationship
+from core.services import relationships
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class FriendshipQueryCountTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user('viewer', password='x')
+        self.client.force_login(self.viewer)
+
+    def _add_people(self, count):
+        # One of each relationship state, plus strangers, so every branch of the resolver is hit.
+        people = [User.objects.create_user(f'person{User.objects.count()}', password='x') for _ in range(count)]
+        friend, outgoing, incoming, blocked = people[:4]
+        relationships.accept_request(relationships.send_request(self.viewer, friend))
+        relationships.send_request(self.viewer, outgoing)
+        relationships.send_request(incoming, self.viewer)
+        # Nothing in the app blocks yet; these rows only arrive from legacy blocked requests in the backfill.
+        Relationship.objects.bulk_create(
+            [
+                Relationship(user=blocked, other_user=self.viewer, state=Relationship.State.BLOCKED),
+                Relationship(user=self.viewer, other_user=blocked, state=Relationship.State.BLOCKED),
+            ]
+        )
+        return people
+
+    def _count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_friendship_states_is_one_query(self):
+        people = self._add_people(8)
+        with self.assertNumQueries(1):
+            states = relationships.friendship_states(self.viewer, people)
+        self.assertEqual(
+            [states[person.id]['state'] for person in people[:5]],
+            [
+                Relationship.State.FRIENDS,
+                Relationship.State.PENDING_OUT,
+                Relationship.State.PENDING_IN,
+                Relationship.State.BLOCKED,
+                'none',
+            ],
+        )
+
+    def test_people_list_queries_do_not_grow_with_people(self):
+        self._add_people(4)
+        baseline = self._count(reverse('people_list'))
+        self._add_people(12)
+        with self.assertNumQueries(baseline):
+            response = self.client.get(reverse('people_list'))
+        self.assertEqual(len(response.context['cards']), 16)
+
+    def test_public_profile_resolves_friendship_in_one_query(self):
+        friend = self._add_people(4)[0]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('public_profile', args=[friend.username]))
+        self.assertEqual(response.context['friendship']['state'], Relationship.State.FRIENDS)
+        relationship_queries = [query for query in queries if 'core_relationship' in query['sql']]
+        self.assertEqual(len(relationship_queries), 1)
+
+    def test_send_friend_request_query_count(self):
+        target = User.objects.create_user('target', password='x')
+        url = reverse('send_friend_request', args=[target.username])
+        self.client.post(url)
+        relationship = Relationship.objects.get(user=self.viewer, other_user=target)
+        self.assertEqual(relationship.state, Relationship.State.PENDING_OUT)
+        # A repeat is answered from one relationship lookup: session, user, target, profile, relationship.
+        with self.assertNumQueries(5):
+            self.client.post(url)
+
+    def test_send_friend_request_keeps_a_block(self):
+        blocked = self._add_people(4)[3]
+        self.client.post(reverse('send_friend_request', args=[blocked.username]))
+        self.assertEqual(
+            set(Relationship.objects.filter(user__in=[self.viewer, blocked], other_user__in=[self.viewer, blocked]).values_list('state', flat=True)),
+            {Relationship.State.BLOCKED},
+        )
+        self.assertFalse(FriendRequest.objects.filter(from_user=self.viewer, to_user=blocked).exists())
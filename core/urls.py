@@ -1,11 +1,22 @@
+from django.conf import settings
 from django.urls import path
 
 from core import views
 
+if settings.SERVER_MODE == 'asgi':
+    generate_plan_view = views.api_generate_plan_async
+    generate_plan_stream_view = views.api_generate_plan_stream_async
+else:
+    generate_plan_view = views.api_generate_plan
+    generate_plan_stream_view = views.api_generate_plan_stream
+
 urlpatterns = [
     path('', views.landing, name='landing'),
-    path('api/generate-plan/', views.api_generate_plan, name='api_generate_plan'),
+    path('api/generate-plan/', generate_plan_view, name='api_generate_plan'),
+    path('api/generate-plan/stream/', generate_plan_stream_view, name='api_generate_plan_stream'),
+    path('api/plan-jobs/<uuid:job_id>/', views.api_plan_job_status, name='api_plan_job_status'),
     path('api/save-plan/', views.api_save_plan, name='api_save_plan'),
+    path('photo/<str:photo_reference>/<str:size>/', views.place_photo, name='place_photo'),
     path('people/', views.people_list, name='people_list'),
     path('city/<slug:city_slug>/', views.city_feed, name='city_feed'),
     path('p/<uuid:plan_id>/', views.public_plan_detail, name='public_plan_detail'),
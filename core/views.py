@@ -1,14 +1,26 @@
 import json
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.views import LoginView, LogoutView
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import IntegrityError, transaction
-from django.db.models import Count, F, Max, OuterRef, Q, Subquery
-from django.http import HttpResponseForbidden, JsonResponse
+from django.db.models import Count, F, Max, Prefetch, Q
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotAllowed,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -19,19 +31,30 @@ from django.views.decorators.http import require_GET, require_POST
 from core.forms import CommentForm, MessageForm, ProfileEditForm, RegisterForm
 from core.models import (
     Conversation,
+    ConversationMember,
     FriendRequest,
-    Friendship,
     Message,
     Plan,
     PlanComment,
     PlanItem,
+    PlanJob,
     PlanJoin,
     PlanLike,
     PlanSave,
+    Relationship,
     UserProfile,
 )
-from core.services.geolocation import GeolocationError, resolve_city_from_coordinates
-from core.services.planner import PlanGenerationError, generate_plan_from_prompt
+from core.services import inbox, photo_cache, place_catalog, plan_document, plan_jobs, profile_images, relationships
+from core.services.deadline import Deadline
+from core.services.geolocation import GeolocationError, resolve_city_from_coordinates, resolve_city_from_coordinates_async
+from core.services.planner import (
+    PlanGenerationError,
+    aiter_plan_events,
+    generate_plan_from_prompt,
+    generate_plan_from_prompt_async,
+    iter_plan_events,
+)
+from core.services.relationships import are_friends, friendship_state, friendship_states
 
 logger = logging.getLogger(__name__)
 
@@ -47,49 +70,6 @@ class AppLogoutView(LogoutView):
     next_page = 'landing'
 
 
-def are_friends(user_a, user_b):
-    if not user_a or not user_b or user_a == user_b:
-        return False
-    return FriendRequest.objects.filter(
-        (
-            Q(from_user=user_a, to_user=user_b)
-            | Q(from_user=user_b, to_user=user_a)
-        ),
-        state=FriendRequest.State.ACCEPTED,
-    ).exists() or Friendship.are_friends(user_a, user_b)
-
-
-def friendship_state(viewer, owner):
-    if not viewer.is_authenticated:
-        return {'state': 'none'}
-    if viewer == owner:
-        return {'state': 'self'}
-
-    accepted = FriendRequest.objects.filter(
-        (Q(from_user=viewer, to_user=owner) | Q(from_user=owner, to_user=viewer)),
-        state=FriendRequest.State.ACCEPTED,
-    ).first()
-    if accepted or Friendship.are_friends(viewer, owner):
-        return {'state': 'friends', 'request': accepted}
-
-    outgoing = FriendRequest.objects.filter(from_user=viewer, to_user=owner, state=FriendRequest.State.PENDING).first()
-    if outgoing:
-        return {'state': 'pending_out', 'request': outgoing}
-
-    incoming = FriendRequest.objects.filter(from_user=owner, to_user=viewer, state=FriendRequest.State.PENDING).first()
-    if incoming:
-        return {'state': 'pending_in', 'request': incoming}
-
-    blocked = FriendRequest.objects.filter(
-        (Q(from_user=viewer, to_user=owner) | Q(from_user=owner, to_user=viewer)),
-        state=FriendRequest.State.BLOCKED,
-    ).first()
-    if blocked:
-        return {'state': 'blocked', 'request': blocked}
-
-    return {'state': 'none'}
-
-
 def _get_conversation(user_a, user_b):
     if user_a.id < user_b.id:
         u1, u2 = user_a, user_b
@@ -98,7 +78,9 @@ def _get_conversation(user_a, user_b):
 
     try:
         with transaction.atomic():
-            convo, _ = Conversation.objects.get_or_create(user1=u1, user2=u2)
+            convo, created = Conversation.objects.get_or_create(user1=u1, user2=u2)
+            if created:
+                inbox.ensure_members(convo)
             return convo
     except IntegrityError:
         return Conversation.objects.get(user1=u1, user2=u2)
@@ -118,7 +100,7 @@ def register_view(request):
 
 @ensure_csrf_cookie
 def landing(request):
-    return render(request, 'core/home.html')
+    return render(request, 'core/home.html', {'plan_jobs_enabled': settings.PLAN_JOBS_ENABLED})
 
 
 def _parse_float(value):
@@ -143,10 +125,9 @@ def _user_preferences(user):
         'preferred_vibes': profile.preferred_vibes,
     }
 
-@require_POST
-def api_generate_plan(request):
+def _parse_generation_payload(body):
     try:
-        payload = json.loads(request.body.decode('utf-8'))
+        payload = json.loads(body.decode('utf-8'))
     except (json.JSONDecodeError, UnicodeDecodeError):
         return JsonResponse({'error': 'Payload inválido.'}, status=400)
 
@@ -154,38 +135,211 @@ def api_generate_plan(request):
     if len(user_prompt) < 8:
         return JsonResponse({'error': 'Describe mejor tu plan (mínimo 8 caracteres).'}, status=400)
 
-    lat = _parse_float(payload.get('lat'))
-    lng = _parse_float(payload.get('lng'))
-    city_name = (payload.get('city_name') or '').strip()
-    country_code = (payload.get('country_code') or 'CO').strip().upper()[:2] or 'CO'
+    return {
+        'prompt': user_prompt,
+        'city_name': (payload.get('city_name') or '').strip(),
+        'country_code': (payload.get('country_code') or 'CO').strip().upper()[:2] or 'CO',
+        'lat': _parse_float(payload.get('lat')),
+        'lng': _parse_float(payload.get('lng')),
+    }
+
+
+def _finish_generation_context(context, resolved, user):
+    if resolved:
+        context['city_name'] = resolved.city_name
+        context['country_code'] = resolved.country_code
+
+    if not context['city_name'] and user.is_authenticated and getattr(user, 'profile', None):
+        context['city_name'] = user.profile.city or user.profile.city_default
 
-    if lat is not None and lng is not None:
+    context['city_name'] = context['city_name'] or 'Medellín'
+    context['user_preferences'] = _user_preferences(user)
+    return context
+
+
+def _generation_context(request, deadline):
+    context = _parse_generation_payload(request.body)
+    if isinstance(context, JsonResponse):
+        return context
+
+    resolved = None
+    if context['lat'] is not None and context['lng'] is not None:
+        try:
+            resolved = resolve_city_from_coordinates(context['lat'], context['lng'], deadline)
+        except GeolocationError:
+            resolved = None
+    return _finish_generation_context(context, resolved, request.user)
+
+
+async def _generation_context_async(request, deadline):
+    context = _parse_generation_payload(request.body)
+    if isinstance(context, JsonResponse):
+        return context
+
+    resolved = None
+    if context['lat'] is not None and context['lng'] is not None:
         try:
-            resolved = resolve_city_from_coordinates(lat, lng)
+            resolved = await resolve_city_from_coordinates_async(context['lat'], context['lng'], deadline)
         except GeolocationError:
             resolved = None
-        if resolved:
-            city_name = resolved.city_name
-            country_code = resolved.country_code
+    return await sync_to_async(_finish_generation_context)(context, resolved, request.user)
+
+
+def _generation_kwargs(context, deadline):
+    return {
+        'city_name': context['city_name'],
+        'lat': context['lat'],
+        'lng': context['lng'],
+        'user_preferences': context['user_preferences'],
+        'deadline': deadline,
+    }
+
+
+def _resolved_location(context):
+    return {'city_name': context['city_name'], 'country_code': context['country_code']}
+
+
+def _enqueue_generation(context, request):
+    if not request.user.is_authenticated and not request.session.session_key:
+        # An empty session never gets a cookie, so store a marker before asking for the key.
+        request.session['plan_jobs'] = True
+        request.session.save()
+    job = plan_jobs.enqueue(
+        {**context, 'resolved_location': _resolved_location(context)},
+        user=request.user,
+        session_key=request.session.session_key,
+    )
+    return JsonResponse(
+        {'job_id': str(job.pk), 'status': job.status, 'status_url': f'/api/plan-jobs/{job.pk}/'},
+        status=202,
+    )
 
-    if not city_name and request.user.is_authenticated and getattr(request.user, 'profile', None):
-        city_name = request.user.profile.city or request.user.profile.city_default
 
-    city_name = city_name or 'Medellín'
+@require_POST
+def api_generate_plan(request):
+    deadline = Deadline.for_plan()
+    context = _generation_context(request, deadline)
+    if isinstance(context, JsonResponse):
+        return context
+
+    if settings.PLAN_JOBS_ENABLED:
+        return _enqueue_generation(context, request)
 
     try:
-        result = generate_plan_from_prompt(
-            user_prompt,
-            city_name=city_name,
-            lat=lat,
-            lng=lng,
-            user_preferences=_user_preferences(request.user),
-        )
+        result = generate_plan_from_prompt(context['prompt'], **_generation_kwargs(context, deadline))
     except PlanGenerationError as exc:
         return JsonResponse({'error': str(exc)}, status=502)
 
-    result['resolved_location'] = {'city_name': city_name, 'country_code': country_code}
-    return JsonResponse(result)
+    result['resolved_location'] = _resolved_location(context)
+    return JsonResponse(plan_document.project_plan(result, plan_document.response_fields(request.GET.get('fields'))))
+
+
+async def api_generate_plan_async(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    deadline = Deadline.for_plan()
+    context = await _generation_context_async(request, deadline)
+    if isinstance(context, JsonResponse):
+        return context
+
+    if settings.PLAN_JOBS_ENABLED:
+        return await sync_to_async(_enqueue_generation)(context, request)
+
+    try:
+        result = await generate_plan_from_prompt_async(context['prompt'], **_generation_kwargs(context, deadline))
+    except PlanGenerationError as exc:
+        return JsonResponse({'error': str(exc)}, status=502)
+
+    result['resolved_location'] = _resolved_location(context)
+    return JsonResponse(plan_document.project_plan(result, plan_document.response_fields(request.GET.get('fields'))))
+
+
+@require_GET
+def api_plan_job_status(request, job_id):
+    job = get_object_or_404(PlanJob, pk=job_id)
+    if not plan_jobs.can_view(job, request.user, request.session.session_key):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    payload = plan_jobs.job_status_payload(job)
+    payload['result'] = plan_document.project_plan(payload['result'], plan_document.response_fields(request.GET.get('fields')))
+    return JsonResponse(payload)
+
+
+def _ndjson_line(event):
+    return json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _streaming_ndjson(stream):
+    response = StreamingHttpResponse(stream, content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_POST
+def api_generate_plan_stream(request):
+    deadline = Deadline.for_plan()
+    context = _generation_context(request, deadline)
+    if isinstance(context, JsonResponse):
+        return context
+    fields = plan_document.response_fields(request.GET.get('fields'))
+
+    def stream():
+        try:
+            for event in iter_plan_events(context['prompt'], **_generation_kwargs(context, deadline)):
+                if event['type'] == 'parsed':
+                    event['resolved_location'] = _resolved_location(context)
+                yield _ndjson_line(plan_document.project_event(event, fields))
+        except PlanGenerationError as exc:
+            yield _ndjson_line({'type': 'error', 'error': str(exc)})
+            return
+        yield _ndjson_line({'type': 'done'})
+
+    return _streaming_ndjson(stream())
+
+
+async def api_generate_plan_stream_async(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    deadline = Deadline.for_plan()
+    context = await _generation_context_async(request, deadline)
+    if isinstance(context, JsonResponse):
+        return context
+    fields = plan_document.response_fields(request.GET.get('fields'))
+
+    async def stream():
+        try:
+            async for event in aiter_plan_events(context['prompt'], **_generation_kwargs(context, deadline)):
+                if event['type'] == 'parsed':
+                    event['resolved_location'] = _resolved_location(context)
+                yield _ndjson_line(plan_document.project_event(event, fields))
+        except PlanGenerationError as exc:
+            yield _ndjson_line({'type': 'error', 'error': str(exc)})
+            return
+        yield _ndjson_line({'type': 'done'})
+
+    return _streaming_ndjson(stream())
+
+
+@require_GET
+def place_photo(request, photo_reference, size):
+    if size not in photo_cache.PHOTO_SIZES or not photo_cache.valid_signature(photo_reference, request.GET.get('s', '')):
+        raise Http404
+    try:
+        digest = photo_cache.get_photo(photo_reference, size)
+        photo = open(photo_cache.blob_path(digest), 'rb')
+    except photo_cache.PhotoUnavailable:
+        return HttpResponse(status=502)
+    except FileNotFoundError:
+        raise Http404
+    etag = f'"{digest}"'
+    if request.headers.get('If-None-Match') == etag:
+        photo.close()
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(photo, content_type='image/jpeg')
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={photo_cache.BROWSER_MAX_AGE}, immutable'
+    return response
 
 
 @login_required
@@ -213,36 +367,31 @@ def api_save_plan(request):
         group=parsed.get('group', ''),
         budget_cop=parsed.get('budget_cop'),
         prompt_text=payload.get('prompt', ''),
-        plan_json=payload,
+        plan_json=plan_document.compact_plan(payload),
     )
 
-    items_to_create = []
-    for window in windows:
-        for idx, place in enumerate(window.get('places') or [], start=1):
-            items_to_create.append(
-                PlanItem(
-                    plan=plan,
-                    time_label=window.get('label', ''),
-                    order=idx,
-                    place_id=place.get('place_id', ''),
-                    name=place.get('name', 'Lugar recomendado'),
-                    rating=place.get('rating'),
-                    user_ratings_total=place.get('user_ratings_total'),
-                    price_level=place.get('price_level'),
-                    address=place.get('address', ''),
-                    photo_reference=place.get('photo_reference', ''),
-                    photo_url=place.get('photo_url', ''),
-                    maps_url=place.get('maps_url', ''),
-                )
-            )
+    saved_places = [
+        (window.get('label', ''), idx, {**place, 'name': place.get('name') or 'Lugar recomendado'})
+        for window in windows
+        for idx, place in enumerate(window.get('places') or [], start=1)
+    ]
+    places = place_catalog.link_places([place for _, _, place in saved_places], city)
+    items_to_create = [
+        PlanItem(plan=plan, time_label=label, order=idx, place=places[place_catalog.place_key(place)])
+        for label, idx, place in saved_places
+    ]
     PlanItem.objects.bulk_create(items_to_create)
     return JsonResponse({'ok': True, 'plan_id': str(plan.id), 'detail_url': f'/p/{plan.id}/'})
 
 
+def _plan_items():
+    return Prefetch('items', queryset=PlanItem.objects.select_related('place'))
+
+
 @login_required
 @require_GET
 def city_feed(request, city_slug):
-    plans = Plan.objects.filter(is_shared=True, city_slug=city_slug).select_related('owner', 'owner__profile').prefetch_related('items').annotate(
+    plans = Plan.objects.filter(is_shared=True, city_slug=city_slug).defer('plan_json').select_related('owner', 'owner__profile').prefetch_related(_plan_items()).annotate(
         joins_count=Count('joins', distinct=True),
         comments_count=Count('comments', distinct=True),
     )
@@ -258,7 +407,7 @@ def city_feed(request, city_slug):
 @login_required
 @require_GET
 def public_plan_detail(request, plan_id):
-    plan = get_object_or_404(Plan.objects.select_related('owner', 'owner__profile').prefetch_related('items', 'comments__user__profile'), id=plan_id)
+    plan = get_object_or_404(Plan.objects.defer('plan_json').select_related('owner', 'owner__profile').prefetch_related(_plan_items(), 'comments__user__profile'), id=plan_id)
     if not plan.is_shared and plan.owner != request.user:
         return HttpResponseForbidden('No tienes acceso a este plan.')
     grouped_items = {}
@@ -354,7 +503,7 @@ def public_profile(request, username):
 
     can_view_full = request.user == owner or (not owner_profile.is_private) or relation['state'] == 'friends'
     template_name = 'core/profile_full.html' if can_view_full else 'core/profile_public.html'
-    plans = Plan.objects.filter(owner=owner, is_shared=True) if can_view_full else Plan.objects.none()
+    plans = Plan.objects.filter(owner=owner, is_shared=True).defer('plan_json') if can_view_full else Plan.objects.none()
     context = {'owner': owner, 'owner_profile': owner_profile, 'plans': plans, 'friendship': relation, 'can_view_full': can_view_full}
     return render(request, template_name, context)
 
@@ -366,7 +515,10 @@ def profile_edit(request):
     if request.method == 'POST':
         form = ProfileEditForm(request.POST, request.FILES, instance=profile)
         if form.is_valid():
-            form.save()
+            profile = form.save()
+            for field_name in profile_images.VARIANTS:
+                if field_name in form.changed_data:
+                    profile_images.process(profile, field_name)
             messages.success(request, 'Perfil actualizado ✅')
             return redirect('profile_edit')
         messages.error(request, 'No se pudo guardar. Revisa los campos.')
@@ -383,22 +535,23 @@ def people_list(request):
     people = User.objects.exclude(id=request.user.id).select_related('profile')
     if q:
         people = people.filter(Q(username__icontains=q) | Q(profile__display_name__icontains=q) | Q(profile__city__icontains=q))
-    people = people[:40]
+    people = list(people[:40])
+    states = friendship_states(request.user, people)
     cards = []
     for person in people:
-        profile, _ = UserProfile.objects.get_or_create(user=person, defaults={'display_name': person.username})
-        cards.append({'user': person, 'profile': profile, 'friendship': friendship_state(request.user, person)})
+        try:
+            profile = person.profile
+        except UserProfile.DoesNotExist:
+            profile, _ = UserProfile.objects.get_or_create(user=person, defaults={'display_name': person.username})
+        cards.append({'user': person, 'profile': profile, 'friendship': states[person.id]})
     return render(request, 'core/people_list.html', {'q': q, 'cards': cards})
 
 
 @login_required
 @require_GET
 def friends_list(request):
-    accepted = FriendRequest.objects.filter(
-        (Q(from_user=request.user) | Q(to_user=request.user)),
-        state=FriendRequest.State.ACCEPTED,
-    ).select_related('from_user__profile', 'to_user__profile')
-    friends = [req.to_user if req.from_user == request.user else req.from_user for req in accepted]
+    friend_rows = Relationship.objects.filter(user=request.user, state=Relationship.State.FRIENDS).select_related('other_user__profile')
+    friends = [row.other_user for row in friend_rows]
 
     incoming = FriendRequest.objects.filter(to_user=request.user, state=FriendRequest.State.PENDING).select_related('from_user__profile')
     outgoing = FriendRequest.objects.filter(from_user=request.user, state=FriendRequest.State.PENDING).select_related('to_user__profile')
@@ -424,12 +577,11 @@ def send_friend_request(request, username):
         messages.info(request, 'Esta persona ya te envió solicitud, acepta desde Amigos.')
     elif relation['state'] == 'pending_out':
         messages.info(request, 'La solicitud ya fue enviada.')
+    elif relation['state'] == 'blocked':
+        # Sending would rewrite both blocked rows as pending and silently lift the block.
+        messages.error(request, 'No puedes enviar solicitud a esta persona.')
     else:
-        FriendRequest.objects.update_or_create(
-            from_user=request.user,
-            to_user=target,
-            defaults={'state': FriendRequest.State.PENDING},
-        )
+        relationships.send_request(request.user, target)
         messages.success(request, 'Solicitud enviada.')
     return redirect(request.META.get('HTTP_REFERER', 'people_list'))
 
@@ -438,15 +590,7 @@ def send_friend_request(request, username):
 @require_POST
 def accept_friend_request(request, request_id):
     friend_request = get_object_or_404(FriendRequest, id=request_id, to_user=request.user, state=FriendRequest.State.PENDING)
-    with transaction.atomic():
-        friend_request.state = FriendRequest.State.ACCEPTED
-        friend_request.save(update_fields=['state', 'updated_at'])
-        Friendship.objects.get_or_create(user1=friend_request.from_user, user2=friend_request.to_user)
-        FriendRequest.objects.filter(
-            from_user=friend_request.to_user,
-            to_user=friend_request.from_user,
-            state=FriendRequest.State.PENDING,
-        ).update(state=FriendRequest.State.REJECTED, updated_at=timezone.now())
+    relationships.accept_request(friend_request)
     messages.success(request, 'Ahora son amigos.')
     return redirect('friends_list')
 
@@ -455,8 +599,7 @@ def accept_friend_request(request, request_id):
 @require_POST
 def reject_friend_request(request, request_id):
     friend_request = get_object_or_404(FriendRequest, id=request_id, to_user=request.user, state=FriendRequest.State.PENDING)
-    friend_request.state = FriendRequest.State.REJECTED
-    friend_request.save(update_fields=['state', 'updated_at'])
+    relationships.reject_request(friend_request)
     messages.info(request, 'Solicitud rechazada.')
     return redirect('friends_list')
 
@@ -464,18 +607,11 @@ def reject_friend_request(request, request_id):
 @login_required
 @require_GET
 def chat_list(request):
-    last_body_sq = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at').values('body')[:1]
-    last_time_sq = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
-    conversations = Conversation.objects.filter(Q(user1=request.user) | Q(user2=request.user)).annotate(
-        last_message=Subquery(last_body_sq),
-        last_message_at=Subquery(last_time_sq),
-    ).order_by('-last_message_at', '-updated_at')
-
-    rows = []
-    for convo in conversations:
-        other = convo.user2 if convo.user1 == request.user else convo.user1
-        unread = convo.messages.filter(is_read=False).exclude(sender=request.user).count()
-        rows.append({'conversation': convo, 'other': other, 'unread': unread})
+    rows = (
+        ConversationMember.objects.filter(user=request.user)
+        .select_related('other_user')
+        .order_by(F('last_message_at').desc(nulls_last=True), '-id')
+    )
     return render(request, 'core/chat_list.html', {'rows': rows})
 
 
@@ -486,7 +622,7 @@ def chat_thread(request, username):
     if not are_friends(request.user, other):
         return HttpResponseForbidden('Solo puedes chatear con amistades aceptadas.')
     conversation = _get_conversation(request.user, other)
-    Message.objects.filter(conversation=conversation, is_read=False).exclude(sender=request.user).update(is_read=True)
+    inbox.mark_read(conversation, request.user)
     messages_qs = conversation.messages.select_related('sender').order_by('created_at')[:200]
     return render(request, 'core/chat_thread.html', {
         'other': other,
@@ -505,8 +641,10 @@ def chat_send(request, username):
     conversation = _get_conversation(request.user, other)
     form = MessageForm(request.POST)
     if form.is_valid():
-        Message.objects.create(conversation=conversation, sender=request.user, body=form.cleaned_data['body'])
-        Conversation.objects.filter(id=conversation.id).update(updated_at=timezone.now())
+        with transaction.atomic():
+            message = Message.objects.create(conversation=conversation, sender=request.user, body=form.cleaned_data['body'])
+            Conversation.objects.filter(id=conversation.id).update(updated_at=timezone.now())
+            inbox.record_message(message)
     else:
         messages.error(request, 'Mensaje inválido.')
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -543,12 +681,12 @@ def chat_poll(request, username):
         }
         for msg in new_messages
     ]
-    Message.objects.filter(id__in=[m['id'] for m in payload], is_read=False).exclude(sender=request.user).update(is_read=True)
+    inbox.mark_read(conversation, request.user, [m['id'] for m in payload])
     return JsonResponse({'messages': payload})
 
 
 @login_required
 def my_plans(request):
-    created_plans = Plan.objects.filter(owner=request.user).prefetch_related('items')
-    saved_plans = Plan.objects.filter(saves__user=request.user).exclude(owner=request.user).distinct()
+    created_plans = Plan.objects.filter(owner=request.user).defer('plan_json')
+    saved_plans = Plan.objects.filter(saves__user=request.user).exclude(owner=request.user).defer('plan_json').distinct()
     return render(request, 'core/my_plans.html', {'created_plans': created_plans, 'saved_plans': saved_plans})
@@ -97,7 +97,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.WhiteNoiseMiddleware',
+    'core.middleware.APICompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -126,6 +127,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'descubriendo.wsgi.application'
+ASGI_APPLICATION = 'descubriendo.asgi.application'
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi').strip().lower()
 
 
 def parse_database_url(url: str):
@@ -170,10 +173,69 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+PROFILE_IMAGE_MAX_BYTES = env_int('PROFILE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+PROFILE_IMAGE_MAX_PIXELS = env_int('PROFILE_IMAGE_MAX_PIXELS', 40_000_000)
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'descubreme_cache',
+    }
+}
+if REDIS_URL:
+    # A shared in-memory cache; also what FRIEND_CACHE_ENABLED needs to take effect.
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+
 GOOGLE_PLACES_API_KEY = os.getenv('GOOGLE_PLACES_API_KEY', '')
+PLACES_MAX_WORKERS = env_int('PLACES_MAX_WORKERS', 8)
+PLACES_TOTAL_TIMEOUT = env_int('PLACES_TOTAL_TIMEOUT', 20)
+PLACES_SPECULATIVE_QUERIES = env_int('PLACES_SPECULATIVE_QUERIES', 4)
+PLACES_QUERY_STAGGER_MS = env_int('PLACES_QUERY_STAGGER_MS', 400)
+PLACE_CATALOG_ENABLED = env_bool('PLACE_CATALOG_ENABLED', True)
+PLACE_CATALOG_MAX_AGE = env_int('PLACE_CATALOG_MAX_AGE', 7 * 24 * 60 * 60)
+PLAN_JSON_COMPRESS = env_bool('PLAN_JSON_COMPRESS', True)
+PLAN_JSON_COMPRESS_MIN_BYTES = env_int('PLAN_JSON_COMPRESS_MIN_BYTES', 1024)
+API_COMPRESSION_ENABLED = env_bool('API_COMPRESSION_ENABLED', True)
+API_COMPRESSION_MIN_BYTES = env_int('API_COMPRESSION_MIN_BYTES', 512)
+PHOTO_CACHE_DIR = os.getenv('PHOTO_CACHE_DIR') or str(BASE_DIR / 'photo_cache')
+PHOTO_CACHE_MAX_BYTES = env_int('PHOTO_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+FRIEND_CACHE_ENABLED = env_bool('FRIEND_CACHE_ENABLED', False)
+FRIEND_CACHE_TTL = env_int('FRIEND_CACHE_TTL', 60 * 60)
+PLACES_CACHE_ENABLED = env_bool('PLACES_CACHE_ENABLED', True)
+PLACES_CACHE_TTL = env_int('PLACES_CACHE_TTL', 6 * 60 * 60)
+PLACES_CACHE_MAX_ENTRIES = env_int('PLACES_CACHE_MAX_ENTRIES', 20000)
+PLACES_CACHE_CULL_FREQUENCY = env_int('PLACES_CACHE_CULL_FREQUENCY', 50)
+PLAN_JOBS_ENABLED = env_bool('PLAN_JOBS_ENABLED', False)
+PLAN_JOBS_MAX_ATTEMPTS = env_int('PLAN_JOBS_MAX_ATTEMPTS', 3)
+PLAN_JOBS_MAX_RUNNING = env_int('PLAN_JOBS_MAX_RUNNING', 16)
+PLAN_JOBS_WORKER_CONCURRENCY = env_int('PLAN_JOBS_WORKER_CONCURRENCY', 4)
+PLAN_JOBS_RETRY_DELAY = env_int('PLAN_JOBS_RETRY_DELAY', 5)
+PLAN_JOBS_STALE_SECONDS = env_int('PLAN_JOBS_STALE_SECONDS', 180)
+PLAN_JOBS_HEARTBEAT_SECONDS = env_int('PLAN_JOBS_HEARTBEAT_SECONDS', 30)
+PLAN_JOBS_RETENTION_SECONDS = env_int('PLAN_JOBS_RETENTION_SECONDS', 86400)
+PLAN_SLA_SECONDS = env_int('PLAN_SLA_SECONDS', 45)
+PLAN_GEOLOCATION_RESERVE_SECONDS = env_int('PLAN_GEOLOCATION_RESERVE_SECONDS', 30)
+PLAN_PLACES_RESERVE_SECONDS = env_int('PLAN_PLACES_RESERVE_SECONDS', 8)
+PLAN_COALESCE_ENABLED = env_bool('PLAN_COALESCE_ENABLED', True)
+PLAN_COALESCE_TTL = env_int('PLAN_COALESCE_TTL', 30)
+PLAN_COALESCE_WAIT = env_int('PLAN_COALESCE_WAIT', 90)
+PROMPT_CACHE_ENABLED = env_bool('PROMPT_CACHE_ENABLED', True)
+PROMPT_CACHE_TTL = env_int('PROMPT_CACHE_TTL', 7 * 24 * 60 * 60)
+PROMPT_CACHE_MAX_ENTRIES = env_int('PROMPT_CACHE_MAX_ENTRIES', 20000)
+PROMPT_CACHE_SIMILARITY = float(os.getenv('PROMPT_CACHE_SIMILARITY', '0.8'))
+LOCAL_PARSER_ENABLED = env_bool('LOCAL_PARSER_ENABLED', True)
+LOCAL_PARSER_MIN_CONFIDENCE = float(os.getenv('LOCAL_PARSER_MIN_CONFIDENCE', '0.75'))
+GEOLOCATION_NETWORK_ENABLED = env_bool('GEOLOCATION_NETWORK_ENABLED', True)
+GEOLOCATION_NETWORK_REFINEMENT = env_bool('GEOLOCATION_NETWORK_REFINEMENT', False)
+GAZETTEER_MAX_DISTANCE_KM = env_int('GAZETTEER_MAX_DISTANCE_KM', 20)
+GAZETTEER_TRUST_DISTANCE_KM = env_int('GAZETTEER_TRUST_DISTANCE_KM', 5)
+GEOCODE_CACHE_ENABLED = env_bool('GEOCODE_CACHE_ENABLED', True)
+GEOCODE_CACHE_PRECISION = env_int('GEOCODE_CACHE_PRECISION', 5)
+GEOCODE_CACHE_TTL = env_int('GEOCODE_CACHE_TTL', 30 * 24 * 60 * 60)
+GEOCODE_CACHE_NEGATIVE_TTL = env_int('GEOCODE_CACHE_NEGATIVE_TTL', 10 * 60)
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '')
 OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', 'google/gemma-2-9b-it:free')
 OPENROUTER_BASE_URL = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1/chat/completions')
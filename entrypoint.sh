@@ -2,5 +2,9 @@
 set -e
 
 python manage.py migrate --noinput
+python manage.py createcachetable
 python manage.py collectstatic --noinput
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+  exec gunicorn descubriendo.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:${PORT:-8000} --workers 2 --timeout 120
+fi
 exec gunicorn descubriendo.wsgi:application --bind 0.0.0.0:${PORT:-8000} --workers 2 --threads 4 --timeout 120